@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite untuk FileEncryptor dan SecureFileShredder
+Mengukur throughput (MB/s), peak RSS dan latency per fase untuk berbagai
+ukuran file, chunk_size, ukuran RSA key dan jumlah worker. File sintetis
+dibuat di tmpfs (/dev/shm) dan di disk. Hasil disimpan sebagai JSON dan
+bisa dibandingkan dengan baseline untuk mendeteksi regresi.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MB = 1024 * 1024
+SHRED_METHODS = ['simple', 'quick', 'dod', 'gutmann']
+
+
+def parse_size(text):
+    """'64M' -> 67108864"""
+    units = {'K': 1024, 'M': MB, 'G': 1024 * MB}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def make_file(path, size):
+    """Buat file sintetis berisi data random"""
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            n = min(MB, remaining)
+            f.write(os.urandom(n))
+            remaining -= n
+
+
+def timed(phases, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+    return result
+
+
+def run_crypto_case(case, workdir):
+    """Jalankan satu case encrypt + decrypt, dipanggil di proses anak"""
+    from file_encryptor import FileEncryptor
+
+    encryptor = FileEncryptor(mode=case['mode'], workers=case['workers'])
+    encryptor.chunk_size = case['chunk_size']
+    encryptor.tune_chunk_size = False  # tanpa ini chunk_size di-clamp dan axis chunk tidak berarti
+    if case['mode'] == 'gcm':
+        encryptor.segment_size = max(case['chunk_size'], 64 * 1024)
+    phases = {}
+
+    source = os.path.join(workdir, 'plain.bin')
+    encrypted = os.path.join(workdir, 'plain.enc')
+    restored = os.path.join(workdir, 'plain.out')
+    make_file(source, case['size'])
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        private_key, public_key = timed(phases, 'rsa_keygen',
+                                        encryptor.generate_key_pair, case['key_size'])
+        aes_key = os.urandom(32)
+        wrapped = timed(phases, 'rsa_wrap', encryptor._wrap_key, public_key, aes_key)
+        timed(phases, 'rsa_unwrap', encryptor._unwrap_key, private_key, wrapped)
+        timed(phases, 'encrypt', encryptor.encrypt_file, source, encrypted, public_key)
+        timed(phases, 'decrypt', encryptor.decrypt_file, encrypted, restored, private_key)
+
+    return {
+        'mb_per_s': {
+            'encrypt': case['size'] / MB / phases['encrypt'],
+            'decrypt': case['size'] / MB / phases['decrypt'],
+        },
+        'phases': phases,
+    }
+
+
+def run_shred_case(case, workdir):
+    """Jalankan satu case shred, dipanggil di proses anak"""
+    from secure_delete import SecureFileShredder
+
+    shredder = SecureFileShredder()
+    shredder.chunk_size = case['chunk_size']
+    target = os.path.join(workdir, 'shred.bin')
+    make_file(target, case['size'])
+    phases = {}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        timed(phases, 'shred', shredder.shred_file, target, case['method'])
+
+    passes = {'simple': 3, 'quick': 7, 'dod': 3, 'gutmann': 35}[case['method']]
+    return {
+        'mb_per_s': {'shred': case['size'] * passes / MB / phases['shred']},
+        'phases': phases,
+    }
+
+
+def run_case_in_child(case):
+    """Mode proses anak: jalankan case, cetak hasil JSON ke stdout"""
+    workdir = tempfile.mkdtemp(prefix='fe_bench_', dir=case['location_path'])
+    try:
+        if case['kind'] == 'shred':
+            result = run_shred_case(case, workdir)
+        else:
+            result = run_crypto_case(case, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # ru_maxrss di Linux dalam KB, di macOS dalam byte
+    scale = 1024 if sys.platform == 'darwin' else 1
+    result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+    # Worker pool proses (mode gcm) diukur terpisah
+    result['peak_rss_workers_kb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+    print(json.dumps(result))
+
+
+def run_smoke(runs=5):
+    """
+    Smoke check CLI: waktu startup `--help` (median, tanpa import berat) lalu
+    satu putaran command di direktori sementara. Return daftar command yang gagal.
+    """
+    cli = [sys.executable, '-m', 'file_encryptor']
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    startup = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cli + ['--help'], capture_output=True, env=env, check=True)
+        startup.append(time.perf_counter() - start)
+    print(f"⏱️  --help startup: {sorted(startup)[len(startup) // 2] * 1000:.0f} ms (median of {runs})")
+
+    workdir = tempfile.mkdtemp(prefix='fe_smoke_')
+    commands = [
+        ['generate'],
+        ['encrypt', 'plain.bin', 'plain.enc'],
+        ['encrypt', '--mode', 'gcm', 'plain.bin', 'plain.gcm'],
+        ['verify', 'plain.enc', 'plain.gcm'],
+        ['rewrap', 'plain.enc', 'plain.gcm', '-n', 'public_key.pem'],
+        ['decrypt', 'plain.gcm', 'plain.out'],
+        ['batch', 'jobs.jsonl'],
+    ]
+    failures = []
+    try:
+        make_file(os.path.join(workdir, 'plain.bin'), MB)
+        with open(os.path.join(workdir, 'jobs.jsonl'), 'w') as f:
+            f.write(json.dumps({'op': 'decrypt', 'input': 'plain.enc', 'output': 'batch.out'}) + '\n')
+            f.write(json.dumps({'op': 'shred', 'path': 'batch.out'}) + '\n')
+        for command in commands:
+            proc = subprocess.run(cli + command + ['-q'], cwd=workdir, env=env,
+                                  capture_output=True, text=True)
+            status = '✅' if proc.returncode == 0 else '❌'
+            print(f"{status} {' '.join(command)}")
+            if proc.returncode != 0:
+                print(proc.stderr)
+                failures.append(command)
+        with open(os.path.join(workdir, 'plain.bin'), 'rb') as a, \
+                open(os.path.join(workdir, 'plain.out'), 'rb') as b:
+            if a.read() != b.read():
+                print("❌ decrypt output differs from input")
+                failures.append(['decrypt'])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return failures
+
+
+def case_name(case):
+    if case['kind'] == 'shred':
+        return (f"shred/{case['method']}/{case['location']}/size={case['size']}"
+                f"/chunk={case['chunk_size']}")
+    return (f"crypto/{case['mode']}/{case['location']}/size={case['size']}"
+            f"/chunk={case['chunk_size']}/key={case['key_size']}/workers={case['workers']}")
+
+
+def build_cases(args, locations):
+    cases = []
+    for location, location_path in locations:
+        for size in args.sizes:
+            for chunk_size in args.chunk_sizes:
+                for mode in args.modes:
+                    for key_size in args.key_sizes:
+                        for workers in (args.workers if mode == 'gcm' else [1]):
+                            cases.append({
+                                'kind': 'crypto', 'mode': mode, 'size': size,
+                                'chunk_size': chunk_size, 'key_size': key_size,
+                                'workers': workers, 'location': location,
+                                'location_path': location_path,
+                            })
+                for method in args.shred_methods:
+                    cases.append({
+                        'kind': 'shred', 'method': method, 'size': size,
+                        'chunk_size': chunk_size, 'location': location,
+                        'location_path': location_path,
+                    })
+    return cases
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """Bandingkan MB/s dengan baseline, kembalikan daftar regresi"""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old:
+            continue
+        for metric, value in result['mb_per_s'].items():
+            old_value = old['mb_per_s'].get(metric)
+            if old_value and value < old_value * (1 - threshold):
+                regressions.append((name, metric, old_value, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark FileEncryptor & SecureFileShredder',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Jalankan default grid, simpan hasil
+  python benchmarks/bench.py -o benchmarks/results/latest.json
+
+  # Simpan baseline, lalu bandingkan setelah perubahan
+  python benchmarks/bench.py -o baseline.json
+  python benchmarks/bench.py -o after.json --baseline baseline.json
+
+  # Grid kustom
+  python benchmarks/bench.py --sizes 64M 512M --workers 1 4 8 --modes gcm
+
+  # Smoke check: startup --help + satu putaran tiap command (termasuk rewrap)
+  python benchmarks/bench.py --smoke
+        '''
+    )
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[8 * MB, 64 * MB])
+    parser.add_argument('--chunk-sizes', nargs='+', type=parse_size, default=[64 * 1024, MB])
+    parser.add_argument('--key-sizes', nargs='+', type=int, default=[2048])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, os.cpu_count() or 1])
+    parser.add_argument('--modes', nargs='+', choices=['cbc', 'gcm'], default=['cbc', 'gcm'])
+    parser.add_argument('--shred-methods', nargs='*', choices=SHRED_METHODS,
+                        default=['simple', 'dod'])
+    parser.add_argument('--tmpfs', default='/dev/shm', help='tmpfs directory (default: /dev/shm)')
+    parser.add_argument('--disk', default=None,
+                        help='On-disk directory (default: system temp dir)')
+    parser.add_argument('-o', '--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Regression threshold as fraction of MB/s (default: 0.10)')
+    parser.add_argument('--smoke', action='store_true',
+                        help='Only time CLI startup and run each command once')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        run_case_in_child(json.loads(args.run_case))
+        return 0
+
+    if args.smoke:
+        return 1 if run_smoke() else 0
+
+    locations = []
+    if args.tmpfs and os.path.isdir(args.tmpfs):
+        locations.append(('tmpfs', args.tmpfs))
+    locations.append(('disk', args.disk or tempfile.gettempdir()))
+
+    cases = build_cases(args, locations)
+    print(f"📊 Running {len(cases)} benchmark case(s)...\n")
+
+    results = {}
+    for i, case in enumerate(cases, 1):
+        name = case_name(case)
+        # Tiap case di proses terpisah supaya peak RSS terukur per case
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__),
+                               '--run-case', json.dumps(case)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"[{i}/{len(cases)}] ❌ {name}\n{proc.stderr}")
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results[name] = result
+        rates = ', '.join(f"{metric} {value:.1f} MB/s"
+                          for metric, value in result['mb_per_s'].items())
+        print(f"[{i}/{len(cases)}] {name}: {rates}, peak RSS {result['peak_rss_kb'] / 1024:.1f} MB")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📁 Results saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regression(s) vs baseline:")
+            for name, metric, old_value, value in regressions:
+                print(f"   {name} [{metric}]: {old_value:.1f} -> {value:.1f} MB/s")
+            return 1
+        print("\n✅ No regressions vs baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,17 +8,471 @@ Untuk file besar, kita gunakan hybrid encryption:
 
 import os
 import sys
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
+from collections import deque, OrderedDict
+import argparse
 import base64
+import hashlib
+import hmac
+import importlib
+import io
 import json
+import lzma
+import mmap
+import secrets
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from metrics import ConsoleObserver, Observer, PhaseTimer, build_observer
+
+
+class _LazyModule:
+    """
+    Proxy modul yang baru di-import saat atributnya pertama kali dipakai.
+    cryptography, asyncio dan multiprocessing (lewat ProcessPoolExecutor) butuh
+    puluhan ms untuk di-import; dengan proxy, --help dan perintah ringan tidak
+    ikut membayar. Tetap aman di worker process (modul di-import ulang di sana).
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+rsa = _LazyModule('cryptography.hazmat.primitives.asymmetric.rsa')
+padding = _LazyModule('cryptography.hazmat.primitives.asymmetric.padding')
+hashes = _LazyModule('cryptography.hazmat.primitives.hashes')
+serialization = _LazyModule('cryptography.hazmat.primitives.serialization')
+algorithms = _LazyModule('cryptography.hazmat.primitives.ciphers.algorithms')
+modes = _LazyModule('cryptography.hazmat.primitives.ciphers.modes')
+_ciphers = _LazyModule('cryptography.hazmat.primitives.ciphers')
+_aead = _LazyModule('cryptography.hazmat.primitives.ciphers.aead')
+_backends = _LazyModule('cryptography.hazmat.backends')
+_exceptions = _LazyModule('cryptography.exceptions')
+futures = _LazyModule('concurrent.futures')
+asyncio = _LazyModule('asyncio')
+
+
+def Cipher(algorithm, mode, backend=None):
+    return _ciphers.Cipher(algorithm, mode, backend)
+
+
+def AESGCM(key):
+    return _aead.AESGCM(key)
+
+
+def default_backend():
+    return _backends.default_backend()
+
+try:
+    import zstandard  # opsional, untuk kompresi zstd
+except ImportError:
+    zstandard = None
+
+# Format container biner (menggantikan JSON + base64)
+# Header: magic, versi, mode, flags, header_size, file_size, chunk_size, iv,
+# panjang key block. Setelah header: key block, lalu ciphertext mentah.
+# Key block versi 1 = satu wrapped AES key; versi 2 = daftar penerima
+# (fingerprint public key + wrapped AES key) supaya payload cukup dienkripsi sekali.
+CONTAINER_MAGIC = b'FENC'
+CONTAINER_VERSION = 2
+MODE_CBC = 1
+MODE_GCM = 2
+HEADER_STRUCT = struct.Struct('>4sBBHIQI16sH')
+UNKNOWN_SIZE = 0xFFFFFFFFFFFFFFFF  # file_size belum diketahui (input dari pipe)
+# Header dipad ke kelipatan 4KB supaya rewrap (ganti key) bisa ditulis in-place
+HEADER_ALIGN = 4096
+RECIPIENT_COUNT_STRUCT = struct.Struct('>H')
+RECIPIENT_STRUCT = struct.Struct('>32sH')  # fingerprint SHA-256, panjang wrapped key
+
+# Mode GCM: payload dipecah jadi segment, tiap segment diawali (panjang, flags)
+# Nonce = 4 byte prefix acak + index segment, AAD = (index, flags)
+SEGMENT_STRUCT = struct.Struct('>IB')
+SEG_LAST = 0x01
+SEG_COMPRESSED = 0x02
+GCM_TAG_SIZE = 16
+
+# Kompresi opsional per segment (mode GCM), algoritma disimpan di bit 8-11 flags header.
+# Segment yang tidak mengecil disimpan apa adanya (tanpa SEG_COMPRESSED).
+COMPRESSION_IDS = {'none': 0, 'zlib': 1, 'lzma': 2, 'zstd': 3}
+COMPRESSION_SHIFT = 8
+COMPRESSION_MASK = 0x0F00
+COMPRESS_SAMPLE_SIZE = 16 * 1024
+COMPRESS_MAX_RATIO = 0.9  # sample harus mengecil minimal 10% supaya segment dikompresi
+
+# I/O zero-copy: chunk disesuaikan st_blksize device, minimal 1MB
+IO_CHUNK_TARGET = 1024 * 1024
+ZERO_BLOCK = bytes(16)
+
+# Segment index (mode GCM): setelah segment terakhir ada tabel offset tiap
+# record segment (relatif ke awal payload), ditutup footer
+# (offset index, ukuran plaintext, magic)
+FLAG_INDEX = 0x0001
+INDEX_ENTRY_STRUCT = struct.Struct('>Q')
+INDEX_FOOTER_STRUCT = struct.Struct('>QQ4s')
+INDEX_MAGIC = b'FIDX'
+
+# Digest plaintext (HMAC-SHA256, key diturunkan dari AES key) di trailer:
+# GCM: sebelum footer index, atas gabungan SHA-256 tiap segment (bisa dihitung paralel)
+# CBC: setelah ciphertext, atas seluruh plaintext.
+# Di trailer (bukan header) karena header ditulis sebelum plaintext selesai dibaca.
+FLAG_DIGEST = 0x0002
+DIGEST_SIZE = 32
+
+# Mode incremental: plaintext dipotong dengan content-defined chunking (CDC),
+# tiap chunk disimpan terenkripsi di store directory dengan nama = MAC isinya.
+# Manifest (urutan chunk + key) disimpan sebagai container terenkripsi biasa.
+# Run berikutnya hanya menulis chunk yang belum ada di manifest lama.
+CDC_MIN_SIZE = 16 * 1024
+CDC_AVG_SIZE = 64 * 1024
+CDC_MAX_SIZE = 256 * 1024
+CDC_BLOCK_SIZE = 8 * 1024 * 1024  # input dibaca per block lalu di-chunk di memory
+CDC_PATTERN_BITS = (18, 12)  # pola cut point sebelum / sesudah CDC_AVG_SIZE (normalized chunking)
+CHUNK_ID_SIZE = 16
+CHUNK_NONCE_SIZE = 12
+STORE_MANIFEST = 'manifest.fenc'
+STORE_CHUNKS = 'chunks'
+STORE_VERSION = 1
+
+
+def _read_exact(f, size):
+    """Baca tepat size byte (stream seperti pipe bisa mengembalikan lebih sedikit)"""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        data = f.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b''.join(parts)
+
+
+def _readinto_exact(f, view):
+    """readinto sampai buffer penuh atau EOF, mengembalikan jumlah byte"""
+    total = 0
+    while total < len(view):
+        n = f.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+
+def _fsync_directory(directory):
+    """fsync entry directory (file baru / rename) supaya ikut durable"""
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass  # tidak semua platform/filesystem bisa fsync directory
+
+
+def _segment_nonce(nonce_prefix, index):
+    return nonce_prefix[:4] + struct.pack('>Q', index)
+
+
+def _compress(compression, data):
+    if compression == COMPRESSION_IDS['zlib']:
+        return zlib.compress(data, 6)
+    if compression == COMPRESSION_IDS['lzma']:
+        return lzma.compress(data, preset=1)
+    if compression == COMPRESSION_IDS['zstd']:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Kompresi tidak dikenal: {compression}")
+
+
+def _decompress(compression, data):
+    if compression == COMPRESSION_IDS['zlib']:
+        return zlib.decompress(data)
+    if compression == COMPRESSION_IDS['lzma']:
+        return lzma.decompress(data)
+    if compression == COMPRESSION_IDS['zstd']:
+        if zstandard is None:
+            raise ValueError("Container memakai zstd, install paket 'zstandard'")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Kompresi tidak dikenal: {compression}")
+
+
+def _maybe_compress(compression, data):
+    """
+    Kompresi segment kalau menguntungkan, atau None kalau tidak.
+    Sample kecil dicoba dulu dengan zlib level 1, jadi data yang sudah
+    terkompresi (video, zip, ...) hampir tidak memakan CPU tambahan.
+    """
+    if not compression or not data:
+        return None
+    sample = data[:COMPRESS_SAMPLE_SIZE]
+    if len(zlib.compress(sample, 1)) > len(sample) * COMPRESS_MAX_RATIO:
+        return None
+    compressed = _compress(compression, data)
+    return compressed if len(compressed) < len(data) else None
+
+
+def _seal_segment(aes_key, nonce_prefix, index, seg_flags, data, compression=0):
+    """
+    Kompresi (opsional) + enkripsi satu segment dengan AES-GCM (dipanggil dari
+    worker pool). Mengembalikan (seg_flags, ciphertext, SHA-256 plaintext).
+    """
+    plain_digest = hashlib.sha256(data).digest()
+    compressed = _maybe_compress(compression, data)
+    if compressed is not None:
+        seg_flags |= SEG_COMPRESSED
+        data = compressed
+    aad = struct.pack('>QB', index, seg_flags)
+    sealed = AESGCM(aes_key).encrypt(_segment_nonce(nonce_prefix, index), data, aad)
+    return seg_flags, sealed, plain_digest
+
+
+def _open_segment(aes_key, nonce_prefix, index, seg_flags, data, compression=0):
+    """Dekripsi + autentikasi (+ dekompresi) satu segment AES-GCM (dipanggil dari worker pool)"""
+    aad = struct.pack('>QB', index, seg_flags)
+    try:
+        plain = AESGCM(aes_key).decrypt(_segment_nonce(nonce_prefix, index), data, aad)
+    except _exceptions.InvalidTag:
+        raise ValueError(f"Segment {index} gagal autentikasi (file rusak atau dimodifikasi)")
+    if seg_flags & SEG_COMPRESSED:
+        plain = _decompress(compression, plain)
+    return plain
+
+
+def _verify_segment(aes_key, nonce_prefix, index, seg_flags, data, compression=0):
+    """Autentikasi satu segment tanpa mengirim plaintext balik: (panjang, SHA-256)"""
+    plain = _open_segment(aes_key, nonce_prefix, index, seg_flags, data, compression)
+    return len(plain), hashlib.sha256(plain).digest()
+
+
+def _verify_container(path, aes_key):
+    """
+    Verifikasi satu container dengan AES key yang sudah di-unwrap (dipanggil
+    dari worker pool verify_tree). Error dikembalikan sebagai hasil, bukan exception.
+    """
+    encryptor = FileEncryptor(observer=Observer())
+    try:
+        with open(path, 'rb') as f:
+            header = encryptor._read_header(f)
+            result = encryptor._verify_opened(f, header, aes_key)
+    except (OSError, ValueError) as e:
+        return {'path': path, 'ok': False, 'error': str(e)}
+    result['path'] = path
+    return result
+
+
+def _digest_mac(aes_key):
+    """HMAC untuk digest plaintext di trailer (key terpisah dari AES key)"""
+    return hmac.new(hmac.new(aes_key, b'fenc-plaintext-digest', hashlib.sha256).digest(),
+                    digestmod=hashlib.sha256)
+
+
+def _header_compression(header):
+    return (header['flags'] & COMPRESSION_MASK) >> COMPRESSION_SHIFT
+
+
+def _cdc_tables(chunk_key):
+    """
+    Tabel translate (byte -> 4 simbol, 2 bit) dan pola cut point, diturunkan
+    dari chunk_key supaya batas chunk tidak bisa ditebak tanpa key.
+    Cut point dicari dengan bytes.translate + bytes.find (kecepatan C),
+    bukan rolling hash per byte di Python.
+    """
+    material = hashlib.shake_256(b'fenc-cdc' + chunk_key).digest(256 + 32)
+    table = bytes(b'0123'[x & 3] for x in material[:256])
+    pattern = bytes(b'0123'[x & 3] for x in material[256:])
+    strict_bits, loose_bits = CDC_PATTERN_BITS
+    return table, pattern[:strict_bits // 2], pattern[:loose_bits // 2]
+
+
+def _cdc_split(symbols, at_eof, pattern_strict, pattern_loose):
+    """
+    Posisi cut point di buffer (sudah di-translate jadi simbol).
+    Sebelum CDC_AVG_SIZE dipakai pola yang lebih panjang (lebih jarang cocok),
+    sesudahnya pola pendek, jadi ukuran chunk mengumpul di sekitar rata-rata.
+    Kalau belum EOF, sisa < CDC_MAX_SIZE dibiarkan untuk block berikutnya.
+    """
+    cuts = []
+    pos = 0
+    n = len(symbols)
+    while pos < n:
+        if not at_eof and n - pos < CDC_MAX_SIZE:
+            break
+        if n - pos <= CDC_MIN_SIZE:
+            cuts.append(n)
+            break
+        normal = min(pos + CDC_AVG_SIZE, n)
+        limit = min(pos + CDC_MAX_SIZE, n)
+        found = symbols.find(pattern_strict, pos + CDC_MIN_SIZE, normal)
+        if found >= 0:
+            pos = found + len(pattern_strict)
+        else:
+            found = symbols.find(pattern_loose, normal, limit)
+            pos = found + len(pattern_loose) if found >= 0 else limit
+        cuts.append(pos)
+    return cuts
+
+
+def _chunk_id(chunk_key, data):
+    """ID chunk: keyed BLAKE2b dari plaintext (tidak bocor tanpa chunk_key)"""
+    return hashlib.blake2b(data, key=chunk_key, digest_size=CHUNK_ID_SIZE).hexdigest()
+
+
+def _seal_chunk(data_key, chunk_id, data):
+    """Enkripsi satu chunk store: nonce acak + AES-GCM, AAD = id chunk"""
+    nonce = os.urandom(CHUNK_NONCE_SIZE)
+    return nonce + AESGCM(data_key).encrypt(nonce, bytes(data), bytes.fromhex(chunk_id))
+
+
+def _open_chunk(data_key, chunk_id, sealed):
+    """Dekripsi + autentikasi satu chunk store (dipanggil dari worker pool)"""
+    try:
+        return AESGCM(data_key).decrypt(sealed[:CHUNK_NONCE_SIZE], sealed[CHUNK_NONCE_SIZE:],
+                                        bytes.fromhex(chunk_id))
+    except _exceptions.InvalidTag:
+        raise ValueError(f"Chunk {chunk_id} gagal autentikasi (store rusak atau dimodifikasi)")
+
+
+def _fingerprint(public_key):
+    """SHA-256 dari DER SubjectPublicKeyInfo"""
+    digest = hashes.Hash(hashes.SHA256(), backend=default_backend())
+    digest.update(public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+    return digest.finalize()
+
+
+PASSPHRASE_ENV = 'FILE_ENCRYPTOR_PASSPHRASE'
+DEFAULT_PASSPHRASE = b'password123'  # passphrase demo untuk private_key.pem
+
+
+def load_passphrase(path=None):
+    """
+    Passphrase private key untuk CLI: isi file path (tanpa newline di akhir),
+    atau $FILE_ENCRYPTOR_PASSPHRASE, atau passphrase demo default.
+    """
+    if path:
+        with open(path, 'rb') as f:
+            passphrase = f.read().rstrip(b'\r\n')
+        if not passphrase:
+            raise ValueError(f"File passphrase kosong: {path}")
+        return passphrase
+    value = os.environ.get(PASSPHRASE_ENV)
+    if value:
+        return value.encode()
+    return DEFAULT_PASSPHRASE
+
+
+def _write_key_pair(private_key, public_key, private_path, public_path, password):
+    """Tulis private key (PKCS8, terenkripsi password, mode 0600) dan public key PEM"""
+    fd = os.open(private_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)  # file lama mungkin masih world-readable
+    with os.fdopen(fd, 'wb') as f:
+        f.write(private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.BestAvailableEncryption(password)
+        ))
+    with open(public_path, 'wb') as f:
+        f.write(public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ))
+
+
+def _provision_key_pair(key_dir, key_size, password):
+    """
+    Generate + simpan satu key pair di key_dir (dipanggil dari worker pool).
+    Key tidak pernah keluar dari worker; yang dikembalikan hanya
+    (fingerprint, durasi generate dalam detik).
+    """
+    start = time.perf_counter()
+    private_key = rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=key_size,
+        backend=default_backend()
+    )
+    seconds = time.perf_counter() - start
+    public_key = private_key.public_key()
+    os.makedirs(key_dir, exist_ok=True)
+    _write_key_pair(private_key, public_key, os.path.join(key_dir, 'private_key.pem'),
+                    os.path.join(key_dir, 'public_key.pem'), password)
+    return _fingerprint(public_key), seconds
+
+
+class KeyCache:
+    """
+    LRU cache AES key yang sudah di-unwrap, dengan key = bytes wrapped key.
+    Container yang memakai data key yang sama tidak perlu operasi RSA lagi.
+    """
+    
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, encrypted_aes_key):
+        with self._lock:
+            aes_key = self._entries.get(encrypted_aes_key)
+            if aes_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(encrypted_aes_key)
+            self.hits += 1
+            return aes_key
+    
+    def put(self, encrypted_aes_key, aes_key):
+        with self._lock:
+            self._entries[encrypted_aes_key] = aes_key
+            self._entries.move_to_end(encrypted_aes_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._entries), 'maxsize': self.maxsize}
+
 
 class FileEncryptor:
-    def __init__(self):
-        self.backend = default_backend()
+    def __init__(self, mode='cbc', workers=1, parallel='process', executor=None,
+                 key_cache_size=0, compression='none', observer=None):
         self.chunk_size = 64 * 1024  # 64KB chunks untuk file besar
+        self.segment_size = 1024 * 1024  # 1MB per segment untuk mode GCM
+        self.mode = mode  # 'cbc' (stream) atau 'gcm' (segment + autentikasi)
+        self.workers = workers  # jumlah worker paralel untuk mode GCM
+        self.parallel = parallel  # 'process' atau 'thread'
+        self.executor = executor  # executor kerja CPU di API async (thread/process, None = default loop)
+        self.key_cache = KeyCache(key_cache_size) if key_cache_size else None
+        self.compression = compression  # 'none', 'zlib', 'lzma' atau 'zstd' (mode GCM)
+        self.passphrase = DEFAULT_PASSPHRASE  # default password private key PEM
+        self.use_mmap = True  # input file biasa dibaca lewat mmap (tanpa copy)
+        self.tune_chunk_size = True  # chunk I/O disesuaikan st_blksize device
+        # Pesan, progress & metrics per fase lewat observer (lihat metrics.py)
+        self.observer = observer or ConsoleObserver(show_progress=False)
+    
+    @property
+    def backend(self):
+        # Di-resolve saat dipakai: membuat FileEncryptor tidak meng-import cryptography
+        return default_backend()
+    
+    def _log(self, text='', level='info'):
+        self.observer.message(text, level)
     
     def generate_key_pair(self, key_size=2048):
         """
@@ -26,41 +480,98 @@ class FileEncryptor:
         - Public key: untuk enkripsi (mudah)
         - Private key: untuk dekripsi (butuh informasi rahasia)
         """
-        print(f"🔑 Generating RSA key pair ({key_size} bit)...")
+        self._log(f"🔑 Generating RSA key pair ({key_size} bit)...")
         private_key = rsa.generate_private_key(
             public_exponent=65537,
             key_size=key_size,
             backend=self.backend
         )
         public_key = private_key.public_key()
-        print("✅ Key pair generated!")
+        self._log("✅ Key pair generated!")
         return private_key, public_key
     
-    def save_keys(self, private_key, public_key, private_path="private_key.pem", public_path="public_key.pem"):
-        """Simpan kunci ke file"""
-        # Simpan private key (RAHASIA!)
-        with open(private_path, 'wb') as f:
-            f.write(private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.BestAvailableEncryption(b'password123')
-            ))
-        print(f"🔒 Private key saved to: {private_path}")
-        
-        # Simpan public key (bisa dibagikan)
-        with open(public_path, 'wb') as f:
-            f.write(public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            ))
-        print(f"🔓 Public key saved to: {public_path}")
-    
-    def load_private_key(self, path="private_key.pem", password=b'password123'):
-        """Load private key dari file"""
+    def save_keys(self, private_key, public_key, private_path="private_key.pem",
+                  public_path="public_key.pem", password=None):
+        """Simpan kunci ke file (private key RAHASIA, public key bisa dibagikan)"""
+        _write_key_pair(private_key, public_key, private_path, public_path,
+                        self.passphrase if password is None else password)
+        self._log(f"🔒 Private key saved to: {private_path}")
+        self._log(f"🔓 Public key saved to: {public_path}")
+    
+    def generate_key_pairs(self, tenants, output_dir, key_size=2048, passphrases=None):
+        """
+        Provisioning key pair untuk banyak tenant sekaligus. Generate RSA
+        dibagi ke worker pool (self.workers, mode 'process' memakai semua core).
+        Tiap tenant dapat directory sendiri: output_dir/<tenant>/{private,public}_key.pem
+        dengan passphrase masing-masing (dari passphrases, atau dibuat acak).
+        Fingerprint public key dicatat di output_dir/manifest.json.
+        Mengembalikan dict berisi path manifest, entry manifest dan passphrase per tenant.
+        """
+        tenants = list(tenants)
+        passphrases = dict(passphrases or {})
+        if len(set(tenants)) != len(tenants):
+            raise ValueError("Nama tenant duplikat")
+        for tenant in tenants:
+            if not tenant or tenant in ('.', '..') or os.sep in tenant or '/' in tenant:
+                raise ValueError(f"Nama tenant tidak valid: {tenant!r}")
+            if os.path.exists(os.path.join(output_dir, tenant, 'private_key.pem')):
+                raise ValueError(f"Key untuk tenant '{tenant}' sudah ada")
+            if tenant not in passphrases:
+                passphrases[tenant] = secrets.token_urlsafe(24).encode()
+        
+        self._log(f"🔑 Generating {len(tenants)} RSA key pair(s) ({key_size} bit, "
+                  f"{self.workers} worker(s))...")
+        os.makedirs(output_dir, exist_ok=True)
+        started = time.perf_counter()
+        jobs = ((os.path.join(output_dir, tenant), key_size, passphrases[tenant])
+                for tenant in tenants)
+        entries = {}
+        for done, (job, (fingerprint, seconds)) in enumerate(
+                self._pipeline(_provision_key_pair, jobs), 1):
+            tenant = os.path.basename(job[0])
+            entries[tenant] = {
+                'fingerprint': fingerprint.hex(),
+                'key_size': key_size,
+                'public_key': os.path.join(tenant, 'public_key.pem'),
+                'private_key': os.path.join(tenant, 'private_key.pem'),
+            }
+            self.observer.phase('rsa_keygen', seconds, tenant=tenant)
+            self.observer.progress('Generating', done, len(tenants))
+        
+        # Manifest ditulis atomik; tenant dari run sebelumnya tetap dipertahankan
+        manifest_path = os.path.join(output_dir, 'manifest.json')
+        manifest = {'tenants': {}}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        manifest['tenants'].update(entries)
+        temp_path = manifest_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(temp_path, manifest_path)
+        
+        elapsed = time.perf_counter() - started
+        self.observer.event('keygen_done', keys=len(tenants), key_size=key_size, seconds=elapsed)
+        self._log(f"✅ {len(tenants)} key pair(s) generated in {elapsed:.1f}s")
+        self._log(f"📋 Manifest: {manifest_path}")
+        return {'manifest': manifest_path, 'keys': entries, 'passphrases': passphrases}
+    
+    def load_private_key(self, path=None, password=None, use_agent=True):
+        """
+        Load private key dari file (default: private_key.pem).
+        Tanpa path dan key agent sedang jalan, yang dikembalikan adalah
+        AgentPrivateKey (unwrap lewat agent, file PEM tidak dibaca sama sekali).
+        Path eksplisit selalu dibaca dari file, karena agent bisa memegang key lain.
+        password None = self.passphrase.
+        """
+        if path is None:
+            if use_agent and agent_available():
+                return AgentPrivateKey()
+            path = "private_key.pem"
         with open(path, 'rb') as f:
             private_key = serialization.load_pem_private_key(
                 f.read(),
-                password=password,
+                password=self.passphrase if password is None else password,
                 backend=self.backend
             )
         return private_key
@@ -74,20 +585,292 @@ class FileEncryptor:
             )
         return public_key
     
+    def _wrap_key(self, public_key, aes_key):
+        """Enkripsi AES key dengan RSA public key (trapdoor function)"""
+        start = time.perf_counter()
+        encrypted_aes_key = public_key.encrypt(
+            aes_key,
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None
+            )
+        )
+        self.observer.phase('rsa_wrap', time.perf_counter() - start)
+        return encrypted_aes_key
+
+    def key_fingerprint(self, public_key):
+        """Fingerprint public key: SHA-256 dari DER SubjectPublicKeyInfo"""
+        return _fingerprint(public_key)
+
+    def _wrap_for_recipients(self, public_keys, aes_key):
+        """Wrap AES key untuk satu atau beberapa public key penerima"""
+        if not isinstance(public_keys, (list, tuple)):
+            public_keys = [public_keys]
+        if not public_keys:
+            raise ValueError("Minimal satu public key penerima")
+        return [(self.key_fingerprint(public_key), self._wrap_key(public_key, aes_key))
+                for public_key in public_keys]
+
+    def _unwrap_header_key(self, private_key, header):
+        """Pilih entry penerima lewat fingerprint, lalu unwrap AES key-nya"""
+        recipients = header['recipients']
+        if len(recipients) == 1 and recipients[0][0] is None:
+            return self._unwrap_key(private_key, recipients[0][1])
+        fingerprint = self.key_fingerprint(private_key.public_key())
+        for recipient_fingerprint, encrypted_aes_key in recipients:
+            if recipient_fingerprint == fingerprint:
+                return self._unwrap_key(private_key, encrypted_aes_key)
+        raise ValueError("Private key ini bukan penerima container (fingerprint tidak cocok)")
+
+    def _unwrap_key(self, private_key, encrypted_aes_key):
+        """Dekripsi AES key dengan RSA private key (trapdoor secret)"""
+        if self.key_cache is not None:
+            aes_key = self.key_cache.get(encrypted_aes_key)
+            if aes_key is not None:
+                return aes_key
+        
+        start = time.perf_counter()
+        aes_key = private_key.decrypt(
+            encrypted_aes_key,
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None
+            )
+        )
+        self.observer.phase('rsa_unwrap', time.perf_counter() - start)
+        if self.key_cache is not None:
+            self.key_cache.put(encrypted_aes_key, aes_key)
+        return aes_key
+
+    def _pack_header(self, mode, file_size, iv, recipients, flags=0,
+                     chunk_size=None, header_size=None):
+        """
+        Susun header container biner (recipients = [(fingerprint, wrapped key)]).
+        Header dipad dengan nol sampai header_size (default: kelipatan HEADER_ALIGN).
+        """
+        key_block = [RECIPIENT_COUNT_STRUCT.pack(len(recipients))]
+        for fingerprint, encrypted_aes_key in recipients:
+            key_block.append(RECIPIENT_STRUCT.pack(fingerprint, len(encrypted_aes_key)))
+            key_block.append(encrypted_aes_key)
+        key_block = b''.join(key_block)
+        
+        used = HEADER_STRUCT.size + len(key_block)
+        if header_size is None:
+            header_size = -(-used // HEADER_ALIGN) * HEADER_ALIGN
+        elif header_size < used:
+            raise ValueError("Header tidak muat di ruang yang tersedia")
+        if chunk_size is None:
+            chunk_size = self.segment_size if mode == MODE_GCM else self.chunk_size
+        header = HEADER_STRUCT.pack(
+            CONTAINER_MAGIC, CONTAINER_VERSION, mode, flags, header_size,
+            file_size, chunk_size, iv, len(key_block)
+        ) + key_block
+        return header.ljust(header_size, b'\x00')
+
+    def _parse_key_block(self, version, key_block):
+        """Parse key block jadi daftar (fingerprint, wrapped key)"""
+        if version == 1:
+            return [(None, key_block)]
+        (count,) = RECIPIENT_COUNT_STRUCT.unpack_from(key_block, 0)
+        position = RECIPIENT_COUNT_STRUCT.size
+        recipients = []
+        for _ in range(count):
+            fingerprint, key_len = RECIPIENT_STRUCT.unpack_from(key_block, position)
+            position += RECIPIENT_STRUCT.size
+            recipients.append((fingerprint, key_block[position:position + key_len]))
+            position += key_len
+        return recipients
+
+    def _compression_id(self):
+        """ID algoritma kompresi untuk flags header"""
+        if self.compression not in COMPRESSION_IDS:
+            raise ValueError(f"Kompresi tidak dikenal: {self.compression}")
+        if self.compression == 'zstd' and zstandard is None:
+            raise ValueError("Kompresi zstd butuh paket 'zstandard' (pip install zstandard)")
+        return COMPRESSION_IDS[self.compression]
+
+    def _gcm_flags(self):
+        """Flags header untuk container GCM baru (index + algoritma kompresi)"""
+        return FLAG_INDEX | FLAG_DIGEST | (self._compression_id() << COMPRESSION_SHIFT)
+
+    def _io_chunk_size(self, f):
+        """Ukuran chunk I/O: kelipatan st_blksize device (dan 16 byte AES block)"""
+        if not self.tune_chunk_size:
+            return self.chunk_size
+        try:
+            blksize = os.fstat(f.fileno()).st_blksize or 4096
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return self.chunk_size
+        size = max(self.chunk_size, IO_CHUNK_TARGET, blksize)
+        size = -(-size // blksize) * blksize
+        return -(-size // 16) * 16
+
+    def _iter_input_views(self, fin, file_size, chunk_size):
+        """
+        Yield memoryview per chunk plaintext tanpa alokasi per chunk:
+        file biasa di-mmap langsung, stream lain pakai readinto ke buffer yang
+        dipakai ulang. Chunk terakhir dipad nol ke kelipatan 16 (CBC).
+        View yang di-yield hanya valid sampai iterasi berikutnya.
+        """
+        buffer = bytearray(chunk_size)
+        buffer_view = memoryview(buffer)
+        
+        if (self.use_mmap and file_size > 0
+                and stat.S_ISREG(os.fstat(fin.fileno()).st_mode)):
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    aligned = file_size - file_size % 16
+                    for offset in range(0, aligned, chunk_size):
+                        chunk = view[offset:min(offset + chunk_size, aligned)]
+                        try:
+                            yield chunk
+                        finally:
+                            # Juga saat consumer gagal (misal ENOSPC): export mmap
+                            # yang masih terbuka membuat mmap.close() gagal
+                            chunk.release()
+                    rest = file_size - aligned
+                    if rest:
+                        buffer_view[:rest] = view[aligned:file_size]
+                        buffer_view[rest:16] = ZERO_BLOCK[rest:]
+                        yield buffer_view[:16]
+                finally:
+                    view.release()
+            return
+        
+        while True:
+            n = _readinto_exact(fin, buffer_view)
+            if not n:
+                return
+            if n % 16:
+                pad = 16 - n % 16
+                buffer_view[n:n + pad] = ZERO_BLOCK[:pad]
+                n += pad
+            yield buffer_view[:n]
+
+    def _pipeline(self, func, jobs):
+        """
+        Jalankan func(*job) di worker pool, hasil (job, result) dikembalikan
+        sesuai urutan job. Jumlah job yang sedang berjalan dibatasi supaya
+        memory tetap terbatas.
+        """
+        if self.workers <= 1:
+            for job in jobs:
+                yield job, func(*job)
+            return
+        
+        pool_class = (futures.ProcessPoolExecutor if self.parallel == 'process'
+                      else futures.ThreadPoolExecutor)
+        with pool_class(max_workers=self.workers) as pool:
+            pending = deque()
+            for job in jobs:
+                pending.append((job, pool.submit(func, *job)))
+                if len(pending) >= self.workers * 2:
+                    job, future = pending.popleft()
+                    yield job, future.result()
+            while pending:
+                job, future = pending.popleft()
+                yield job, future.result()
+
+    def _iter_plain_segments(self, f):
+        """Baca file per segment, tandai segment terakhir dengan SEG_LAST"""
+        index = 0
+        current = f.read(self.segment_size)
+        while True:
+            following = f.read(self.segment_size) if current else b''
+            seg_flags = 0 if following else SEG_LAST
+            yield index, seg_flags, current
+            if seg_flags & SEG_LAST:
+                return
+            index += 1
+            current = following
+
+    def _iter_sealed_segments(self, f):
+        """Baca record segment (panjang, flags, ciphertext) sampai segment terakhir"""
+        index = 0
+        while True:
+            record = _read_exact(f, SEGMENT_STRUCT.size)
+            if len(record) < SEGMENT_STRUCT.size:
+                raise ValueError("Ciphertext terpotong (segment terakhir tidak ditemukan)")
+            stored_len, seg_flags = SEGMENT_STRUCT.unpack(record)
+            data = _read_exact(f, stored_len)
+            if len(data) < stored_len:
+                raise ValueError("Ciphertext terpotong (file rusak?)")
+            yield index, seg_flags, data
+            if seg_flags & SEG_LAST:
+                return
+            index += 1
+
+    def _read_header(self, f):
+        """Baca header container biner, posisi file berhenti di awal ciphertext"""
+        header = self._unpack_header(_read_exact(f, HEADER_STRUCT.size))
+        key_block = _read_exact(f, header.pop('key_block_len'))
+        header['recipients'] = self._parse_key_block(header['version'], key_block)
+        # Lewati sisa header dengan read (bukan seek) supaya bisa dari pipe
+        _read_exact(f, header['header_size'] - HEADER_STRUCT.size - len(key_block))
+        return header
+
+    def _unpack_header(self, fixed):
+        """Parse bagian tetap header container"""
+        if len(fixed) < HEADER_STRUCT.size:
+            raise ValueError("File terlalu pendek untuk container terenkripsi")
+        (magic, version, mode, flags, header_size,
+         file_size, chunk_size, iv, key_block_len) = HEADER_STRUCT.unpack(fixed)
+        if magic != CONTAINER_MAGIC:
+            raise ValueError("Bukan container FileEncryptor")
+        if version > CONTAINER_VERSION:
+            raise ValueError(f"Versi container tidak didukung: {version}")
+        return {
+            'version': version,
+            'mode': mode,
+            'flags': flags,
+            'header_size': header_size,
+            'file_size': file_size,
+            'chunk_size': chunk_size,
+            'iv': iv,
+            'key_block_len': key_block_len,
+        }
+
+    def is_container(self, path):
+        """Cek apakah file adalah container biner FileEncryptor"""
+        with open(path, 'rb') as f:
+            return f.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+
     def encrypt_file(self, input_file, output_file, public_key):
         """
         Enkripsi file menggunakan hybrid encryption:
         1. Generate random AES key (symmetric key)
-        2. Enkripsi file dengan AES (cepat untuk file besar)
-        3. Enkripsi AES key dengan RSA (trapdoor function)
+        2. Enkripsi AES key dengan RSA (trapdoor function)
+        3. Enkripsi file dengan AES, di-stream chunk demi chunk ke output
+        Memory yang dipakai hanya sebesar chunk_size, berapapun ukuran file.
+        public_key boleh berupa list: payload dienkripsi sekali, AES key
+        di-wrap untuk tiap penerima.
         """
-        print(f"\n🔐 Encrypting: {input_file}")
+        self._log(f"\n🔐 Encrypting: {input_file}")
+        started = time.perf_counter()
         
         # 1. Generate random AES key (256-bit)
         aes_key = os.urandom(32)
         iv = os.urandom(16)  # Initialization vector
         
-        # 2. Enkripsi file dengan AES
+        file_size = os.path.getsize(input_file)
+        self._log(f"📊 File size: {file_size:,} bytes")
+        if self.mode != 'gcm' and self.compression != 'none':
+            raise ValueError("Kompresi hanya didukung di mode gcm")
+        
+        # 2. Enkripsi AES key dengan RSA (TRAPDOOR FUNCTION)
+        self._log("🔒 Encrypting AES key with RSA (trapdoor function)...")
+        recipients = self._wrap_for_recipients(public_key, aes_key)
+        
+        if self.mode == 'gcm':
+            self._encrypt_gcm(input_file, output_file, aes_key, iv, recipients, file_size)
+            self.observer.event('encrypt_done', file=input_file, mode=self.mode, bytes=file_size,
+                                seconds=time.perf_counter() - started)
+            return
+        
+        # 3. Enkripsi file dengan AES, tulis langsung ke output
         cipher = Cipher(
             algorithms.AES(aes_key),
             modes.CBC(iv),
@@ -95,61 +878,1068 @@ class FileEncryptor:
         )
         encryptor = cipher.encryptor()
         
-        file_size = os.path.getsize(input_file)
-        encrypted_chunks = []
+        self._log("⏳ Encrypting with AES...")
+        
+        with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+            fout.write(self._pack_header(MODE_CBC, file_size, iv, recipients, flags=FLAG_DIGEST))
+            mac = _digest_mac(aes_key)
+            
+            # Zero-copy: input lewat mmap/readinto, ciphertext ke buffer yang dipakai ulang
+            chunk_size = self._io_chunk_size(fin)
+            out = bytearray(chunk_size + 15)  # update_into butuh len(data) + block - 1
+            out_view = memoryview(out)
+            timer = PhaseTimer()
+            done = 0
+            for chunk in self._iter_input_views(fin, file_size, chunk_size):
+                with timer.measure('aes', len(chunk)):
+                    n = encryptor.update_into(chunk, out)
+                with timer.measure('write', n):
+                    fout.write(out_view[:n])
+                with timer.measure('digest', len(chunk)):
+                    mac.update(chunk[:file_size - done])  # tanpa padding nol
+                done = min(done + len(chunk), file_size)
+                self.observer.progress('Encrypting', done, file_size)
+            fout.write(encryptor.finalize())
+            fout.write(mac.digest())
         
-        print(f"📊 File size: {file_size:,} bytes")
-        print("⏳ Encrypting with AES...")
+        timer.report(self.observer, file=input_file)
+        self.observer.event('encrypt_done', file=input_file, mode=self.mode, bytes=file_size,
+                            seconds=time.perf_counter() - started)
+        self._log(f"✅ File encrypted successfully!")
+        self._log(f"📁 Output: {output_file}")
+        self._log(f"💡 AES key dienkripsi dengan RSA - hanya private key yang bisa dekripsi!")
+    
+    def _encrypt_gcm(self, input_file, output_file, aes_key, iv, recipients, file_size):
+        """
+        Enkripsi mode GCM: file dipecah jadi segment berukuran tetap,
+        tiap segment di-seal AES-GCM secara paralel lalu ditulis berurutan
+        """
+        self._log(f"⏳ Encrypting with AES-GCM ({self.workers} worker(s))...")
+        
+        with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+            fout.write(self._pack_header(MODE_GCM, file_size, iv, recipients,
+                                         flags=self._gcm_flags()))
+            compression = self._compression_id()
+            jobs = ((aes_key, iv, index, seg_flags, data, compression)
+                    for index, seg_flags, data in self._iter_plain_segments(fin))
+            offsets = []
+            position = 0
+            timer = PhaseTimer()
+            started = time.perf_counter()
+            mac = _digest_mac(aes_key)
+            for job, (seg_flags, sealed, plain_digest) in self._pipeline(_seal_segment, jobs):
+                offsets.append(position)
+                mac.update(plain_digest)
+                with timer.measure('write', len(sealed)):
+                    fout.write(SEGMENT_STRUCT.pack(len(sealed), seg_flags))
+                    fout.write(sealed)
+                position += SEGMENT_STRUCT.size + len(sealed)
+                self.observer.progress('Encrypting', job[2] * self.segment_size + len(job[4]),
+                                       file_size)
+            self._write_index(fout, offsets, position, file_size, mac.digest())
+        
+        # Read + AES-GCM jalan overlap di pipeline, dilaporkan sebagai satu fase
+        timer.add('read_aes', time.perf_counter() - started - timer.seconds['write'], file_size)
+        timer.report(self.observer, file=input_file)
+        
+        self._log(f"✅ File encrypted successfully!")
+        self._log(f"📁 Output: {output_file}")
+        self._log(f"💡 AES key dienkripsi dengan RSA - hanya private key yang bisa dekripsi!")
+    
+    def decrypt_file(self, input_file, output_file, private_key):
+        """
+        Dekripsi file:
+        1. Dekripsi AES key dengan RSA private key (trapdoor secret)
+        2. Dekripsi file dengan AES key, di-stream chunk demi chunk
+        File lama berformat JSON tetap bisa didekripsi.
+        """
+        self._log(f"\n🔓 Decrypting: {input_file}")
+        started = time.perf_counter()
+        
+        if not self.is_container(input_file):
+            self._decrypt_legacy_json(input_file, output_file, private_key)
+            return
+        
+        with open(input_file, 'rb') as fin:
+            header = self._read_header(fin)
+            if header['mode'] not in (MODE_CBC, MODE_GCM):
+                raise ValueError(f"Mode container tidak dikenal: {header['mode']}")
+            
+            # 1. Dekripsi AES key dengan RSA private key (TRAPDOOR SECRET)
+            self._log("🔑 Decrypting AES key with RSA private key...")
+            aes_key = self._unwrap_header_key(private_key, header)
+            
+            if header['mode'] == MODE_GCM:
+                written = self._decrypt_gcm(fin, output_file, aes_key, header)
+                self.observer.event('decrypt_done', file=input_file, mode='gcm', bytes=written,
+                                    seconds=time.perf_counter() - started)
+                return
+            
+            # 2. Dekripsi file dengan AES
+            self._log("⏳ Decrypting file with AES...")
+            cipher = Cipher(
+                algorithms.AES(aes_key),
+                modes.CBC(header['iv']),
+                backend=self.backend
+            )
+            decryptor = cipher.decryptor()
+            
+            # Zero-copy: readinto + update_into ke buffer yang dipakai ulang
+            chunk_size = self._io_chunk_size(fin)
+            buffer = bytearray(chunk_size)
+            buffer_view = memoryview(buffer)
+            out = bytearray(chunk_size + 15)
+            out_view = memoryview(out)
+            
+            # Buang padding: tulis hanya sampai file_size asli
+            file_size = header['file_size']
+            remaining = file_size
+            # Baca tepat sepanjang ciphertext (trailer digest tidak ikut didekripsi)
+            ciphertext_left = -(-file_size // 16) * 16
+            mac = _digest_mac(aes_key) if header['flags'] & FLAG_DIGEST else None
+            timer = PhaseTimer()
+            try:
+                with open(output_file, 'wb') as fout:
+                    while remaining > 0:
+                        with timer.measure('read'):
+                            n = fin.readinto(buffer_view[:min(chunk_size, ciphertext_left)])
+                        if not n:
+                            raise ValueError("Ciphertext terpotong (file rusak?)")
+                        timer.bytes['read'] += n
+                        ciphertext_left -= n
+                        with timer.measure('aes', n):
+                            written = decryptor.update_into(buffer_view[:n], out)
+                        take = min(written, remaining)
+                        with timer.measure('write', take):
+                            fout.write(out_view[:take])
+                        if mac is not None:
+                            with timer.measure('digest', take):
+                                mac.update(out_view[:take])
+                        remaining -= take
+                        self.observer.progress('Decrypting', file_size - remaining, file_size)
+                    decryptor.finalize()
+                    if mac is not None and not hmac.compare_digest(_read_exact(fin, DIGEST_SIZE),
+                                                                   mac.digest()):
+                        raise ValueError("Digest plaintext tidak cocok "
+                                         "(file rusak atau dimodifikasi)")
+            except ValueError:
+                # Plaintext yang tidak lolos verifikasi jangan ditinggal di disk
+                os.remove(output_file)
+                raise
+        
+        timer.report(self.observer, file=input_file)
+        self.observer.event('decrypt_done', file=input_file, mode='cbc', bytes=file_size,
+                            seconds=time.perf_counter() - started)
+        self._log(f"✅ File decrypted successfully!")
+        self._log(f"📁 Output: {output_file}")
+    
+    def _write_index(self, fout, offsets, index_offset, file_size, digest=None):
+        """Tulis segment index (+ digest plaintext) + footer di akhir container"""
+        for offset in offsets:
+            fout.write(INDEX_ENTRY_STRUCT.pack(offset))
+        if digest is not None:
+            fout.write(digest)
+        fout.write(INDEX_FOOTER_STRUCT.pack(index_offset, file_size, INDEX_MAGIC))
+    
+    def _read_index_footer(self, f, header):
+        """Baca footer: posisi segment index (absolut) dan ukuran plaintext"""
+        if not header['flags'] & FLAG_INDEX:
+            raise ValueError("Container tidak punya segment index")
+        f.seek(-INDEX_FOOTER_STRUCT.size, os.SEEK_END)
+        index_offset, file_size, magic = INDEX_FOOTER_STRUCT.unpack(
+            f.read(INDEX_FOOTER_STRUCT.size))
+        if magic != INDEX_MAGIC:
+            raise ValueError("Footer segment index rusak")
+        return header['header_size'] + index_offset, file_size
+    
+    def _read_segment_at(self, f, header, index_position, index):
+        """Seek langsung ke record segment ke-index lewat segment index"""
+        f.seek(index_position + index * INDEX_ENTRY_STRUCT.size)
+        (offset,) = INDEX_ENTRY_STRUCT.unpack(f.read(INDEX_ENTRY_STRUCT.size))
+        f.seek(header['header_size'] + offset)
+        stored_len, seg_flags = SEGMENT_STRUCT.unpack(f.read(SEGMENT_STRUCT.size))
+        data = f.read(stored_len)
+        if len(data) < stored_len:
+            raise ValueError("Ciphertext terpotong (file rusak?)")
+        return index, seg_flags, data
+    
+    def decrypt_range(self, input_file, offset, length, private_key):
+        """
+        Dekripsi sebagian file saja (plaintext[offset:offset+length]).
+        Hanya segment/block yang mencakup range itu yang dibaca dan didekripsi,
+        jadi biayanya sebanding dengan panjang range, bukan ukuran file.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("Offset dan length tidak boleh negatif")
+        if not self.is_container(input_file):
+            raise ValueError("Format JSON lama tidak mendukung dekripsi sebagian")
         
         with open(input_file, 'rb') as f:
+            header = self._read_header(f)
+            if header['mode'] not in (MODE_CBC, MODE_GCM):
+                raise ValueError(f"Mode container tidak dikenal: {header['mode']}")
+            
+            file_size = header['file_size']
+            if header['mode'] == MODE_GCM:
+                index_position, file_size = self._read_index_footer(f, header)
+            end = min(offset + length, file_size)
+            if offset >= end:
+                return b''
+            
+            aes_key = self._unwrap_header_key(private_key, header)
+            
+            if header['mode'] == MODE_CBC:
+                return self._decrypt_range_cbc(f, header, aes_key, offset, end)
+            
+            segment_size = header['chunk_size']
+            first = offset // segment_size
+            last = (end - 1) // segment_size
+            compression = _header_compression(header)
+            jobs = ((aes_key, header['iv']) + self._read_segment_at(f, header, index_position, i)
+                    + (compression,) for i in range(first, last + 1))
+            plain = b''.join(data for _, data in self._pipeline(_open_segment, jobs))
+        
+        start = offset - first * segment_size
+        return plain[start:start + (end - offset)]
+    
+    def _decrypt_range_cbc(self, f, header, aes_key, offset, end):
+        """CBC bisa random access: IV untuk block ke-n adalah ciphertext block n-1"""
+        first_block = offset // 16
+        last_block = (end - 1) // 16
+        if first_block == 0:
+            iv = header['iv']
+            f.seek(header['header_size'])
+        else:
+            f.seek(header['header_size'] + (first_block - 1) * 16)
+            iv = f.read(16)
+        ciphertext = f.read((last_block - first_block + 1) * 16)
+        
+        decryptor = Cipher(
+            algorithms.AES(aes_key),
+            modes.CBC(iv),
+            backend=self.backend
+        ).decryptor()
+        plain = decryptor.update(ciphertext) + decryptor.finalize()
+        start = offset - first_block * 16
+        return plain[start:start + (end - offset)]
+    
+    def _decrypt_gcm(self, fin, output_file, aes_key, header):
+        """Dekripsi mode GCM: segment diautentikasi paralel, ditulis berurutan"""
+        self._log(f"⏳ Decrypting with AES-GCM ({self.workers} worker(s))...")
+        
+        compression = _header_compression(header)
+        jobs = ((aes_key, header['iv'], index, seg_flags, data, compression)
+                for index, seg_flags, data in self._iter_sealed_segments(fin))
+        written = 0
+        file_size = header['file_size'] if header['file_size'] != UNKNOWN_SIZE else 0
+        timer = PhaseTimer()
+        started = time.perf_counter()
+        try:
+            with open(output_file, 'wb') as fout:
+                for _, plain in self._pipeline(_open_segment, jobs):
+                    with timer.measure('write', len(plain)):
+                        fout.write(plain)
+                    written += len(plain)
+                    if file_size:
+                        self.observer.progress('Decrypting', written, file_size)
+            
+            if header['file_size'] != UNKNOWN_SIZE and written != header['file_size']:
+                raise ValueError("Ukuran hasil dekripsi tidak sesuai header (file rusak?)")
+        except ValueError:
+            # Segment sebelum yang gagal autentikasi sudah tertulis: jangan ditinggal
+            os.remove(output_file)
+            raise
+        
+        timer.add('read_aes', time.perf_counter() - started - timer.seconds['write'], written)
+        timer.report(self.observer, file=fin.name)
+        self._log(f"✅ File decrypted successfully!")
+        self._log(f"📁 Output: {output_file}")
+        return written
+    
+    def decrypt_batch(self, inputs, output_dir, private_key, suffix='.enc'):
+        """
+        Dekripsi banyak container sekaligus dengan private key yang sudah di-load
+        sekali. inputs berisi file dan/atau directory (di-scan rekursif); hasil
+        ditulis ke output_dir dengan struktur relatif yang sama dan suffix dibuang.
+        AES key yang sudah di-unwrap disimpan di LRU cache (self.key_cache).
+        """
+        if self.key_cache is None:
+            self.key_cache = KeyCache()
+        
+        jobs = []
+        for path in inputs:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    for filename in sorted(files):
+                        src = os.path.join(root, filename)
+                        jobs.append((src, os.path.relpath(src, path)))
+            else:
+                jobs.append((path, os.path.basename(path)))
+        
+        self._log(f"\n📋 Found {len(jobs)} file(s) to decrypt")
+        results = {'ok': 0, 'failed': 0, 'errors': {}}
+        for src, relative in jobs:
+            if suffix and relative.endswith(suffix):
+                relative = relative[:-len(suffix)]
+            dst = os.path.join(output_dir, relative)
+            os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+            try:
+                self.decrypt_file(src, dst, private_key)
+                results['ok'] += 1
+            except Exception as e:
+                self._log(f"❌ Error: {src}: {e}", 'error')
+                results['failed'] += 1
+                results['errors'][src] = str(e)
+        
+        results['cache'] = self.key_cache.stats()
+        self._log(f"\n✅ Decrypted {results['ok']} file(s), {results['failed']} failed")
+        self._log(f"🔑 Key cache: {results['cache']['hits']} hit(s), "
+                  f"{results['cache']['misses']} miss(es)")
+        return results
+    
+    def run_batch(self, lines, emit, recipients=None, private_key_path=None):
+        """
+        Jalankan manifest JSON lines berisi job encrypt/decrypt/shred dalam satu
+        proses. Tiap baris satu objek, misal:
+          {"op": "encrypt", "input": "a.txt", "output": "a.enc", "recipients": ["team.pem"]}
+          {"op": "decrypt", "input": "a.enc", "output": "a.txt"}
+          {"op": "shred", "path": "a.txt", "method": "dod"}
+        Key PEM di-load sekali per path lalu dipakai ulang untuk semua job;
+        private key dengan passphrase lain bisa diberi "passphrase_file".
+        Baris kosong dan baris '#' dilewati. Hasil tiap job dikirim ke emit(dict)
+        segera setelah job selesai; job yang gagal tidak menghentikan batch.
+        """
+        keys = {}
+        
+        def public_keys(paths):
+            for path in paths:
+                if ('public', path) not in keys:
+                    keys['public', path] = self.load_public_key(path)
+            return [keys['public', path] for path in paths]
+        
+        def private_key(job):
+            # Tanpa path: agent atau private_key.pem, sama seperti command decrypt
+            path = job.get('private_key', private_key_path)
+            passphrase_file = job.get('passphrase_file')
+            if ('private', path, passphrase_file) not in keys:
+                password = load_passphrase(passphrase_file) if passphrase_file else None
+                keys['private', path, passphrase_file] = self.load_private_key(path, password)
+            return keys['private', path, passphrase_file]
+        
+        shredder = None
+        counts = {'ok': 0, 'failed': 0}
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            result = {'id': line_number, 'op': None, 'ok': False}
+            started = time.perf_counter()
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    raise ValueError("Job harus berupa objek JSON")
+                result['id'] = job.get('id', line_number)
+                result['op'] = op = job.get('op')
+                
+                if op == 'encrypt':
+                    paths = job.get('recipients') or recipients or ["public_key.pem"]
+                    saved = self.mode, self.compression
+                    self.mode = job.get('mode', self.mode)
+                    self.compression = job.get('compress', self.compression)
+                    try:
+                        if job.get('incremental'):
+                            store_key = None
+                            if self.is_incremental_store(job['output']):
+                                store_key = private_key(job)
+                            self.encrypt_incremental(job['input'], job['output'],
+                                                     public_keys(paths), store_key)
+                        else:
+                            self.encrypt_file(job['input'], job['output'], public_keys(paths))
+                    finally:
+                        self.mode, self.compression = saved
+                    result['bytes'] = os.path.getsize(job['input'])
+                
+                elif op == 'decrypt':
+                    key = private_key(job)
+                    if self.is_incremental_store(job['input']):
+                        self.decrypt_incremental(job['input'], job['output'], key)
+                    else:
+                        self.decrypt_file(job['input'], job['output'], key)
+                    result['bytes'] = os.path.getsize(job['output'])
+                
+                elif op == 'shred':
+                    if shredder is None:
+                        # Import di sini: batch tanpa job shred tidak perlu secure_delete
+                        from secure_delete import SecureFileShredder
+                        shredder = SecureFileShredder(observer=self.observer)
+                    path, method = job['path'], job.get('method', 'quick')
+                    if os.path.isdir(path):
+                        if not shredder.shred_directory(path, method, job.get('recursive', False),
+                                                        crypto_erase=job.get('crypto_erase', False)):
+                            raise ValueError(f"Shred directory gagal: {path}")
+                    else:
+                        result['bytes'] = shredder.get_file_size(path)
+                        shred = (shredder.crypto_erase_file if job.get('crypto_erase')
+                                 else shredder.shred_file)
+                        if not shred(path, method):
+                            raise ValueError(f"Shred gagal: {path}")
+                
+                else:
+                    raise ValueError(f"Op tidak dikenal: {op!r} (encrypt/decrypt/shred)")
+                result['ok'] = True
+                counts['ok'] += 1
+            except KeyError as e:
+                result['error'] = f"ValueError: field {e} wajib diisi"
+                counts['failed'] += 1
+            except Exception as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+                counts['failed'] += 1
+            result['seconds'] = round(time.perf_counter() - started, 6)
+            if not result['ok']:
+                self._log(f"❌ Error: job {result['id']}: {result['error']}", 'error')
+            emit(result)
+        
+        self.observer.event('batch_done', **counts)
+        self._log(f"\n✅ Batch: {counts['ok']} job(s) ok, {counts['failed']} failed")
+        return counts
+    
+    def encrypt_stream(self, fin, fout, public_key):
+        """
+        Enkripsi dari stream ke stream (misal stdin -> stdout) lewat EncryptingWriter.
+        Selalu memakai mode GCM karena ukuran input belum diketahui di awal.
+        """
+        self._log("\n🔐 Encrypting stream...")
+        with EncryptingWriter(fout, public_key, encryptor=self) as writer:
             while True:
-                chunk = f.read(self.chunk_size)
+                chunk = fin.read(self.chunk_size)
                 if not chunk:
                     break
-                
-                # Padding untuk chunk terakhir
-                if len(chunk) % 16 != 0:
-                    chunk += b'\x00' * (16 - len(chunk) % 16)
-                
-                encrypted_chunks.append(encryptor.update(chunk))
+                writer.write(chunk)
+        self._log(f"✅ Stream encrypted successfully! ({writer.bytes_written:,} bytes)")
+    
+    def decrypt_stream(self, fin, fout, private_key):
+        """Dekripsi dari stream ke stream (misal stdin -> stdout) lewat DecryptingReader"""
+        self._log("\n🔓 Decrypting stream...")
+        total = 0
+        with DecryptingReader(fin, private_key, encryptor=self) as reader:
+            while True:
+                chunk = reader.read(self.segment_size)
+                if not chunk:
+                    break
+                fout.write(chunk)
+                total += len(chunk)
+        fout.flush()
+        self._log(f"✅ Stream decrypted successfully! ({total:,} bytes)")
+    
+    async def _run_cpu(self, func, *args):
+        """
+        Jalankan kerja CPU per segment di self.executor supaya event loop tidak
+        macet. func harus fungsi module-level dengan argumen picklable (bytes,
+        int) supaya ProcessPoolExecutor juga bisa dipakai.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+    
+    async def _run_local(self, func, *args):
+        """
+        Jalankan kerja yang butuh state lokal (RSA key / agent, cipher context
+        CBC, self) di thread. Kalau self.executor adalah ProcessPoolExecutor,
+        kerja ini jalan di default executor loop karena tidak bisa di-pickle.
+        """
+        executor = self.executor
+        if executor is not None and isinstance(executor, futures.ProcessPoolExecutor):
+            executor = None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+    
+    async def encrypt_stream_async(self, reader, writer, public_key):
+        """
+        Versi asyncio dari encrypt_stream (mode GCM).
+        reader/writer adalah asyncio.StreamReader/StreamWriter; backpressure
+        dijaga lewat writer.drain(), RSA dan AES-GCM jalan di self.executor.
+        Mengembalikan jumlah byte plaintext yang dienkripsi.
+        """
+        aes_key = os.urandom(32)
+        iv = os.urandom(16)
+        compression = self._compression_id()
+        recipients = await self._run_local(self._wrap_for_recipients, public_key, aes_key)
+        writer.write(self._pack_header(MODE_GCM, UNKNOWN_SIZE, iv, recipients,
+                                       flags=self._gcm_flags()))
         
-        encrypted_chunks.append(encryptor.finalize())
-        encrypted_data = b''.join(encrypted_chunks)
+        async def read_segment():
+            try:
+                return await reader.readexactly(self.segment_size)
+            except asyncio.IncompleteReadError as e:
+                return e.partial
         
-        # 3. Enkripsi AES key dengan RSA (TRAPDOOR FUNCTION)
-        print("🔒 Encrypting AES key with RSA (trapdoor function)...")
-        encrypted_aes_key = public_key.encrypt(
-            aes_key,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
+        # Beberapa segment boleh di-seal bersamaan di executor, ditulis berurutan
+        pending = deque()
+        offsets = []
+        position = 0
+        total = 0
+        index = 0
+        mac = _digest_mac(aes_key)
         
-        # 4. Simpan semua ke file output
-        output_data = {
-            'encrypted_key': base64.b64encode(encrypted_aes_key).decode('utf-8'),
-            'iv': base64.b64encode(iv).decode('utf-8'),
-            'file_size': file_size,
-            'encrypted_data': base64.b64encode(encrypted_data).decode('utf-8')
-        }
+        async def emit_one():
+            nonlocal position
+            seg_flags, sealed, plain_digest = await pending.popleft()
+            mac.update(plain_digest)
+            offsets.append(position)
+            writer.write(SEGMENT_STRUCT.pack(len(sealed), seg_flags))
+            writer.write(sealed)
+            position += SEGMENT_STRUCT.size + len(sealed)
+            await writer.drain()
         
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f)
+        current = await read_segment()
+        while True:
+            following = await read_segment() if len(current) == self.segment_size else b''
+            seg_flags = 0 if following else SEG_LAST
+            total += len(current)
+            pending.append(asyncio.ensure_future(
+                self._run_cpu(_seal_segment, aes_key, iv, index, seg_flags, current, compression)))
+            while len(pending) > max(1, self.workers):
+                await emit_one()
+            if seg_flags & SEG_LAST:
+                break
+            index += 1
+            current = following
+        while pending:
+            await emit_one()
         
-        print(f"✅ File encrypted successfully!")
-        print(f"📁 Output: {output_file}")
-        print(f"💡 AES key dienkripsi dengan RSA - hanya private key yang bisa dekripsi!")
+        self._write_index(writer, offsets, position, total, mac.digest())
+        await writer.drain()
+        return total
     
-    def decrypt_file(self, input_file, output_file, private_key):
+    async def decrypt_stream_async(self, reader, writer, private_key):
         """
-        Dekripsi file:
-        1. Dekripsi AES key dengan RSA private key (trapdoor secret)
-        2. Dekripsi file dengan AES key yang sudah didekripsi
+        Versi asyncio dari decrypt_stream (container CBC atau GCM).
+        Mengembalikan jumlah byte plaintext yang ditulis.
+        """
+        try:
+            header = self._unpack_header(await reader.readexactly(HEADER_STRUCT.size))
+            key_block = await reader.readexactly(header.pop('key_block_len'))
+            await reader.readexactly(header['header_size'] - HEADER_STRUCT.size - len(key_block))
+        except asyncio.IncompleteReadError:
+            raise ValueError("File terlalu pendek untuk container terenkripsi")
+        header['recipients'] = self._parse_key_block(header['version'], key_block)
+        aes_key = await self._run_local(self._unwrap_header_key, private_key, header)
+        
+        total = 0
+        if header['mode'] == MODE_CBC:
+            decryptor = Cipher(
+                algorithms.AES(aes_key),
+                modes.CBC(header['iv']),
+                backend=self.backend
+            ).decryptor()
+            remaining = header['file_size']
+            # Baca tepat sepanjang ciphertext, trailer digest dibaca terpisah
+            ciphertext_left = -(-remaining // 16) * 16
+            mac = _digest_mac(aes_key) if header['flags'] & FLAG_DIGEST else None
+            while remaining > 0:
+                chunk = await reader.read(min(self.chunk_size, ciphertext_left))
+                if not chunk:
+                    raise ValueError("Ciphertext terpotong (file rusak?)")
+                ciphertext_left -= len(chunk)
+                data = await self._run_local(decryptor.update, chunk)
+                data = data[:remaining]
+                if mac is not None:
+                    mac.update(data)
+                remaining -= len(data)
+                total += len(data)
+                writer.write(data)
+                await writer.drain()
+            if mac is not None:
+                try:
+                    digest = await reader.readexactly(DIGEST_SIZE)
+                except asyncio.IncompleteReadError:
+                    raise ValueError("Digest plaintext terpotong (file rusak?)")
+                if not hmac.compare_digest(digest, mac.digest()):
+                    raise ValueError("Digest plaintext tidak cocok (file rusak atau dimodifikasi)")
+            return total
+        if header['mode'] != MODE_GCM:
+            raise ValueError(f"Mode container tidak dikenal: {header['mode']}")
+        
+        index = 0
+        while True:
+            try:
+                stored_len, seg_flags = SEGMENT_STRUCT.unpack(
+                    await reader.readexactly(SEGMENT_STRUCT.size))
+                data = await reader.readexactly(stored_len)
+            except asyncio.IncompleteReadError:
+                raise ValueError("Ciphertext terpotong (segment terakhir tidak ditemukan)")
+            plain = await self._run_cpu(_open_segment, aes_key, header['iv'],
+                                        index, seg_flags, data, _header_compression(header))
+            writer.write(plain)
+            total += len(plain)
+            await writer.drain()
+            if seg_flags & SEG_LAST:
+                return total
+            index += 1
+    
+    async def encrypt_file_async(self, input_file, output_file, public_key):
+        """Versi asyncio dari encrypt_file (dijalankan di thread, lihat _run_local)"""
+        await self._run_local(self.encrypt_file, input_file, output_file, public_key)
+    
+    async def decrypt_file_async(self, input_file, output_file, private_key):
+        """Versi asyncio dari decrypt_file (dijalankan di thread, lihat _run_local)"""
+        await self._run_local(self.decrypt_file, input_file, output_file, private_key)
+    
+    def _verify_opened(self, f, header, aes_key):
+        """Verifikasi container yang header-nya sudah dibaca dari f (ValueError kalau rusak)"""
+        if header['mode'] == MODE_GCM:
+            return self._verify_gcm(f, header, aes_key)
+        if header['mode'] == MODE_CBC:
+            return self._verify_cbc(f, header, aes_key)
+        raise ValueError(f"Mode container tidak dikenal: {header['mode']}")
+    
+    def _verify_gcm(self, f, header, aes_key):
+        """
+        Autentikasi semua segment paralel (plaintext dibuang di worker, hanya
+        panjang + SHA-256 yang kembali), lalu cocokkan segment index, footer
+        dan digest plaintext di trailer.
+        """
+        compression = _header_compression(header)
+        offsets = []
+        position = 0
+        
+        def jobs():
+            nonlocal position
+            for index, seg_flags, data in self._iter_sealed_segments(f):
+                offsets.append(position)
+                position += SEGMENT_STRUCT.size + len(data)
+                yield aes_key, header['iv'], index, seg_flags, data, compression
+        
+        mac = _digest_mac(aes_key)
+        total = 0
+        for _, (length, plain_digest) in self._pipeline(_verify_segment, jobs()):
+            total += length
+            mac.update(plain_digest)
+        
+        has_digest = bool(header['flags'] & FLAG_DIGEST)
+        if header['flags'] & FLAG_INDEX:
+            expected = b''.join(INDEX_ENTRY_STRUCT.pack(offset) for offset in offsets)
+            if _read_exact(f, len(expected)) != expected:
+                raise ValueError("Segment index tidak cocok dengan posisi segment")
+            digest = _read_exact(f, DIGEST_SIZE) if has_digest else None
+            footer = _read_exact(f, INDEX_FOOTER_STRUCT.size)
+            if len(footer) < INDEX_FOOTER_STRUCT.size:
+                raise ValueError("Footer segment index tidak ditemukan (file terpotong?)")
+            index_offset, file_size, magic = INDEX_FOOTER_STRUCT.unpack(footer)
+            if magic != INDEX_MAGIC or index_offset != position or file_size != total:
+                raise ValueError("Footer segment index rusak")
+            if has_digest and not hmac.compare_digest(digest, mac.digest()):
+                raise ValueError("Digest plaintext tidak cocok (file rusak atau dimodifikasi)")
+        if f.read(1):
+            raise ValueError("Ada data tambahan setelah akhir container")
+        if header['file_size'] != UNKNOWN_SIZE and total != header['file_size']:
+            raise ValueError("Ukuran plaintext tidak sesuai header (file rusak?)")
+        return {'ok': True, 'mode': 'gcm', 'bytes': total, 'segments': len(offsets),
+                'digest': has_digest}
+    
+    def _verify_cbc(self, f, header, aes_key):
+        """
+        CBC tidak punya autentikasi per block: integritas hanya bisa dicek lewat
+        digest di trailer. Container CBC lama (tanpa digest) hanya dicek ukurannya.
+        """
+        file_size = header['file_size']
+        ciphertext_left = -(-file_size // 16) * 16
+        if not header['flags'] & FLAG_DIGEST:
+            if os.fstat(f.fileno()).st_size != header['header_size'] + ciphertext_left:
+                raise ValueError("Ukuran ciphertext tidak sesuai header (file rusak?)")
+            return {'ok': True, 'mode': 'cbc', 'bytes': file_size, 'segments': 0,
+                    'digest': False}
+        
+        decryptor = Cipher(
+            algorithms.AES(aes_key),
+            modes.CBC(header['iv']),
+            backend=self.backend
+        ).decryptor()
+        mac = _digest_mac(aes_key)
+        chunk_size = self._io_chunk_size(f)
+        buffer = bytearray(chunk_size)
+        buffer_view = memoryview(buffer)
+        out = bytearray(chunk_size + 15)
+        out_view = memoryview(out)
+        remaining = file_size
+        while ciphertext_left > 0:
+            n = f.readinto(buffer_view[:min(chunk_size, ciphertext_left)])
+            if not n:
+                raise ValueError("Ciphertext terpotong (file rusak?)")
+            ciphertext_left -= n
+            written = decryptor.update_into(buffer_view[:n], out)
+            take = min(written, remaining)
+            mac.update(out_view[:take])
+            remaining -= take
+        decryptor.finalize()
+        if not hmac.compare_digest(_read_exact(f, DIGEST_SIZE), mac.digest()):
+            raise ValueError("Digest plaintext tidak cocok (file rusak atau dimodifikasi)")
+        if f.read(1):
+            raise ValueError("Ada data tambahan setelah akhir container")
+        return {'ok': True, 'mode': 'cbc', 'bytes': file_size, 'segments': 0, 'digest': True}
+    
+    def verify_file(self, path, private_key):
+        """
+        Cek integritas container tanpa menulis plaintext ke mana pun.
+        Mode GCM: semua segment diautentikasi paralel (self.workers) + digest
+        plaintext di trailer. Mode CBC: didekripsi di memory lalu digest dicocokkan.
+        Mengembalikan dict hasil; ValueError kalau container rusak.
+        """
+        if not self.is_container(path):
+            raise ValueError("Format JSON lama tidak mendukung verify")
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            header = self._read_header(f)
+            aes_key = self._unwrap_header_key(private_key, header)
+            result = self._verify_opened(f, header, aes_key)
+        result['path'] = path
+        result['seconds'] = time.perf_counter() - started
+        self.observer.event('verify_done', **result)
+        return result
+    
+    def verify_tree(self, paths, private_key):
+        """
+        Verifikasi semua container di daftar file/directory (rekursif).
+        AES key di-unwrap di proses utama (RSA / agent), verifikasi per file
+        jalan di worker pool (self.workers, self.parallel). File yang bukan
+        container dilewati.
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, dirs, filenames in os.walk(path):
+                    files.extend(os.path.join(root, filename) for filename in sorted(filenames))
+            else:
+                files.append(path)
+        
+        self._log(f"\n🔍 Verifying {len(files)} file(s) with {self.workers} worker(s)...")
+        results = {'ok': 0, 'failed': 0, 'skipped': 0, 'unauthenticated': 0, 'bytes': 0,
+                   'errors': {}}
+        
+        def fail(path, error):
+            self._log(f"❌ Error: {path}: {error}", 'error')
+            results['failed'] += 1
+            results['errors'][path] = error
+        
+        def jobs():
+            for path in files:
+                try:
+                    if not self.is_container(path):
+                        results['skipped'] += 1
+                        continue
+                    with open(path, 'rb') as f:
+                        header = self._read_header(f)
+                    yield path, self._unwrap_header_key(private_key, header)
+                except (OSError, ValueError) as e:
+                    fail(path, str(e))
+        
+        started = time.perf_counter()
+        for _, result in self._pipeline(_verify_container, jobs()):
+            if not result['ok']:
+                fail(result['path'], result['error'])
+            else:
+                results['ok'] += 1
+                results['bytes'] += result['bytes']
+                if not result['digest'] and result['mode'] == 'cbc':
+                    results['unauthenticated'] += 1
+            self.observer.progress('Verifying', results['ok'] + results['failed'] + results['skipped'],
+                                   len(files))
+        
+        elapsed = time.perf_counter() - started
+        self.observer.phase('verify', elapsed, results['bytes'])
+        self._log(f"✅ Verified {results['ok']} file(s) ({results['bytes']:,} bytes), "
+                  f"{results['failed']} failed, {results['skipped']} skipped")
+        if results['unauthenticated']:
+            self._log(f"⚠️  {results['unauthenticated']} CBC container(s) tanpa digest: "
+                      f"hanya ukuran yang dicek", 'warning')
+        return results
+    
+    def rewrap_file(self, path, old_private_key, new_public_keys):
+        """
+        Rotasi key tanpa re-enkripsi payload: AES key di-unwrap dengan private
+        key lama, di-wrap dengan public key baru, lalu hanya header yang ditulis
+        ulang (in-place). Kalau header baru lebih besar dari ruang yang ada,
+        payload mentah disalin ke file baru (tetap tanpa dekripsi).
+        Sebelum header ditimpa, AES key dicek terhadap payload (lihat
+        _check_rewrap_key) supaya key yang salah tidak dikunci permanen.
+        Mengembalikan True kalau header ditulis in-place.
         """
-        print(f"\n🔓 Decrypting: {input_file}")
+        if not self.is_container(path):
+            raise ValueError("Format JSON lama tidak mendukung rewrap, jalankan decrypt + encrypt")
         
+        with open(path, 'rb') as f:
+            header = self._read_header(f)
+            aes_key = self._unwrap_header_key(old_private_key, header)
+            self._check_rewrap_key(f, header, aes_key, path)
+        recipients = self._wrap_for_recipients(new_public_keys, aes_key)
+        
+        def new_header(header_size=None):
+            return self._pack_header(header['mode'], header['file_size'], header['iv'],
+                                     recipients, flags=header['flags'],
+                                     chunk_size=header['chunk_size'], header_size=header_size)
+        
+        try:
+            data = new_header(header['header_size'])
+        except ValueError:
+            data = None
+        
+        if data is not None:
+            with open(path, 'r+b') as f:
+                f.write(data)
+                f.flush()
+                start = time.perf_counter()
+                os.fsync(f.fileno())
+                self.observer.phase('fsync', time.perf_counter() - start, len(data), file=path)
+            return True
+        
+        # Header tidak muat: salin payload mentah ke file sementara lalu replace
+        data = new_header()
+        temp_path = path + '.rewrap.tmp'
+        with open(path, 'rb') as fin, open(temp_path, 'wb') as fout:
+            fin.seek(header['header_size'])
+            fout.write(data)
+            while True:
+                chunk = fin.read(self.segment_size)
+                if not chunk:
+                    break
+                fout.write(chunk)
+            fout.flush()
+            start = time.perf_counter()
+            os.fsync(fout.fileno())
+            self.observer.phase('fsync', time.perf_counter() - start, fout.tell(), file=path)
+        os.replace(temp_path, path)
+        return False
+    
+    def _check_rewrap_key(self, f, header, aes_key, path):
+        """
+        Pastikan AES key hasil unwrap memang key payload sebelum header ditulis
+        ulang (ValueError kalau tidak). GCM: segment pertama diautentikasi
+        (cukup satu segment, biaya tetap per file). CBC dengan digest: HMAC
+        trailer dicocokkan (harus dekripsi seluruh payload). CBC lama tanpa
+        digest tidak bisa dicek, hanya diberi warning.
+        """
+        if header['mode'] == MODE_GCM:
+            for index, seg_flags, data in self._iter_sealed_segments(f):
+                _open_segment(aes_key, header['iv'], index, seg_flags, data,
+                              _header_compression(header))
+                return
+        elif header['flags'] & FLAG_DIGEST:
+            self._verify_cbc(f, header, aes_key)
+        else:
+            self._log(f"⚠️  {path}: container CBC tanpa digest, key tidak bisa "
+                      f"diverifikasi sebelum rewrap", 'warning')
+    
+    def rewrap_tree(self, paths, old_private_key, new_public_keys):
+        """
+        Rewrap semua container di daftar file/directory (rekursif) dengan
+        worker pool thread (self.workers). File yang bukan container dilewati.
+        Waktu total sebanding jumlah file, bukan jumlah byte yang disimpan.
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, dirs, filenames in os.walk(path):
+                    files.extend(os.path.join(root, filename) for filename in filenames)
+            else:
+                files.append(path)
+        
+        self._log(f"\n🔁 Rewrapping {len(files)} file(s) with {self.workers} worker(s)...")
+        results = {'in_place': 0, 'copied': 0, 'skipped': 0, 'failed': 0, 'errors': {}}
+        
+        def rewrap_one(path):
+            if not self.is_container(path):
+                return 'skipped'
+            return 'in_place' if self.rewrap_file(path, old_private_key, new_public_keys) else 'copied'
+        
+        with futures.ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            submitted = {pool.submit(rewrap_one, path): path for path in files}
+            for future in submitted:
+                try:
+                    results[future.result()] += 1
+                except Exception as e:
+                    self._log(f"❌ Error: {submitted[future]}: {e}", 'error')
+                    results['failed'] += 1
+                    results['errors'][submitted[future]] = str(e)
+        
+        self._log(f"✅ Rewrapped {results['in_place'] + results['copied']} file(s) "
+                  f"({results['in_place']} in-place, {results['copied']} copied), "
+                  f"{results['skipped']} skipped, {results['failed']} failed")
+        return results
+    
+    def is_incremental_store(self, path):
+        """Cek apakah path adalah store directory mode incremental"""
+        return os.path.isfile(os.path.join(path, STORE_MANIFEST))
+    
+    def _chunk_path(self, store_dir, chunk_id):
+        return os.path.join(store_dir, STORE_CHUNKS, chunk_id[:2], chunk_id)
+    
+    def _read_manifest(self, store_dir, private_key):
+        with open(os.path.join(store_dir, STORE_MANIFEST), 'rb') as f:
+            with DecryptingReader(f, private_key, encryptor=self) as reader:
+                manifest = json.loads(reader.read())
+        if manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Versi manifest tidak dikenal: {manifest.get('version')}")
+        return manifest
+    
+    def _write_manifest(self, store_dir, manifest, public_key):
+        """Manifest baru ditulis ke file sementara lalu di-replace (atomik)"""
+        path = os.path.join(store_dir, STORE_MANIFEST)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            with EncryptingWriter(f, public_key, encryptor=self) as writer:
+                writer.write(json.dumps(manifest).encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        _fsync_directory(store_dir)
+    
+    def _iter_cdc_chunks(self, fin, chunk_key):
+        """Potong stream input jadi chunk content-defined (memoryview)"""
+        table, pattern_strict, pattern_loose = _cdc_tables(chunk_key)
+        buffer = b''
+        while True:
+            block = fin.read(CDC_BLOCK_SIZE)
+            at_eof = not block
+            buffer += block
+            view = memoryview(buffer)
+            pos = 0
+            for cut in _cdc_split(buffer.translate(table), at_eof, pattern_strict, pattern_loose):
+                yield view[pos:cut]
+                pos = cut
+            buffer = buffer[pos:]
+            if at_eof:
+                return
+    
+    def encrypt_incremental(self, input_file, store_dir, public_key, private_key=None):
+        """
+        Enkripsi incremental ke store directory (misal backup VM image tiap malam).
+        Plaintext dipotong dengan content-defined chunking, jadi sisipan/hapusan
+        hanya mengubah chunk di sekitarnya. Chunk yang ID-nya sudah tercatat di
+        manifest lama tidak dienkripsi/ditulis ulang: I/O tulis sebanding
+        perubahan, bukan ukuran file.
+        Kalau store sudah ada, private_key dibutuhkan untuk membaca manifest lama
+        (key data & ID chunk dipakai ulang).
+        Durability: tiap chunk baru di-fsync, begitu juga directory yang mendapat
+        entry baru, sebelum manifest (temp file di-fsync, lalu replace + fsync
+        directory store). Hanya file store yang di-fsync, bukan seluruh sistem.
+        """
+        self._log(f"\n🔐 Incremental encrypt: {input_file} -> {store_dir}")
+        started = time.perf_counter()
+        
+        if self.is_incremental_store(store_dir):
+            if private_key is None:
+                raise ValueError("Store sudah ada: private key dibutuhkan untuk membaca manifest")
+            self._log("🔑 Reading previous manifest...")
+            previous = self._read_manifest(store_dir, private_key)
+            data_key = base64.b64decode(previous['data_key'])
+            chunk_key = base64.b64decode(previous['chunk_key'])
+            known = {chunk_id for chunk_id, _ in previous['chunks']}
+        else:
+            os.makedirs(store_dir, exist_ok=True)
+            data_key = os.urandom(32)
+            chunk_key = os.urandom(32)
+            known = set()
+        
+        file_size = os.path.getsize(input_file)
+        self._log(f"📊 File size: {file_size:,} bytes")
+        stored = set(known)
+        new_dirs = set()  # directory yang mendapat entry baru (perlu fsync)
+        if not known and not self.is_incremental_store(store_dir):
+            new_dirs.add(os.path.dirname(os.path.abspath(store_dir)))
+        chunks = []
+        stats = {'chunks': 0, 'new_chunks': 0, 'bytes_written': 0, 'bytes_reused': 0}
+        timer = PhaseTimer()
+        done = 0
+        with open(input_file, 'rb') as fin:
+            for chunk in self._iter_cdc_chunks(fin, chunk_key):
+                with timer.measure('hash', len(chunk)):
+                    chunk_id = _chunk_id(chunk_key, chunk)
+                chunks.append([chunk_id, len(chunk)])
+                if chunk_id in stored:
+                    stats['bytes_reused'] += len(chunk)
+                else:
+                    with timer.measure('aes', len(chunk)):
+                        sealed = _seal_chunk(data_key, chunk_id, chunk)
+                    path = self._chunk_path(store_dir, chunk_id)
+                    fanout = os.path.dirname(path)
+                    if not os.path.isdir(fanout):
+                        os.makedirs(fanout)
+                        new_dirs.add(os.path.dirname(fanout))
+                        new_dirs.add(store_dir)
+                    with open(path, 'wb') as f:
+                        with timer.measure('write', len(sealed)):
+                            f.write(sealed)
+                            f.flush()
+                        with timer.measure('fsync'):
+                            os.fsync(f.fileno())
+                    new_dirs.add(fanout)
+                    stored.add(chunk_id)
+                    stats['new_chunks'] += 1
+                    stats['bytes_written'] += len(sealed)
+                done += len(chunk)
+                self.observer.progress('Encrypting', done, file_size)
+        stats['chunks'] = len(chunks)
+        
+        # Chunk baru (dan entry directory-nya) harus sudah di disk sebelum
+        # manifest yang merujuknya
+        with timer.measure('fsync'):
+            for directory in sorted(new_dirs, key=len, reverse=True):
+                _fsync_directory(directory)
+        self._write_manifest(store_dir, {
+            'version': STORE_VERSION,
+            'file_size': done,
+            'data_key': base64.b64encode(data_key).decode(),
+            'chunk_key': base64.b64encode(chunk_key).decode(),
+            'chunks': chunks,
+        }, public_key)
+        
+        # Hapus chunk yang tidak dirujuk manifest baru
+        referenced = {chunk_id for chunk_id, _ in chunks}
+        stats['removed_chunks'] = 0
+        for chunk_id in known - referenced:
+            try:
+                os.remove(self._chunk_path(store_dir, chunk_id))
+                stats['removed_chunks'] += 1
+            except FileNotFoundError:
+                pass
+        
+        timer.report(self.observer, file=input_file)
+        stats['seconds'] = time.perf_counter() - started
+        self.observer.event('incremental_done', file=input_file, bytes=done, **stats)
+        self._log(f"✅ {stats['chunks']:,} chunk(s): {stats['new_chunks']:,} new "
+                  f"({stats['bytes_written']:,} bytes written), "
+                  f"{stats['bytes_reused']:,} bytes unchanged, "
+                  f"{stats['removed_chunks']:,} stale chunk(s) removed")
+        self._log(f"📁 Store: {store_dir}")
+        return stats
+    
+    def decrypt_incremental(self, store_dir, output_file, private_key):
+        """Rakit ulang plaintext dari store incremental (chunk didekripsi paralel)"""
+        self._log(f"\n🔓 Decrypting incremental store: {store_dir}")
+        manifest = self._read_manifest(store_dir, private_key)
+        data_key = base64.b64decode(manifest['data_key'])
+        
+        def jobs():
+            for chunk_id, _ in manifest['chunks']:
+                with open(self._chunk_path(store_dir, chunk_id), 'rb') as f:
+                    yield data_key, chunk_id, f.read()
+        
+        written = 0
+        with open(output_file, 'wb') as fout:
+            for index, (_, plain) in enumerate(self._pipeline(_open_chunk, jobs())):
+                if len(plain) != manifest['chunks'][index][1]:
+                    raise ValueError("Ukuran chunk tidak sesuai manifest (store rusak?)")
+                fout.write(plain)
+                written += len(plain)
+                self.observer.progress('Decrypting', written, manifest['file_size'])
+        if written != manifest['file_size']:
+            raise ValueError("Ukuran hasil dekripsi tidak sesuai manifest (store rusak?)")
+        
+        self._log(f"✅ File decrypted successfully!")
+        self._log(f"📁 Output: {output_file}")
+        return written
+    
+    def _decrypt_legacy_json(self, input_file, output_file, private_key):
+        """Dekripsi file format lama (JSON + base64, seluruh file di memory)"""
         # 1. Load encrypted data
         with open(input_file, 'r') as f:
             data = json.load(f)
@@ -160,18 +1950,11 @@ class FileEncryptor:
         encrypted_data = base64.b64decode(data['encrypted_data'])
         
         # 2. Dekripsi AES key dengan RSA private key (TRAPDOOR SECRET)
-        print("🔑 Decrypting AES key with RSA private key...")
-        aes_key = private_key.decrypt(
-            encrypted_aes_key,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
+        self._log("🔑 Decrypting AES key with RSA private key...")
+        aes_key = self._unwrap_key(private_key, encrypted_aes_key)
         
         # 3. Dekripsi file dengan AES
-        print("⏳ Decrypting file with AES...")
+        self._log("⏳ Decrypting file with AES (legacy JSON format)...")
         cipher = Cipher(
             algorithms.AES(aes_key),
             modes.CBC(iv),
@@ -188,83 +1971,823 @@ class FileEncryptor:
         with open(output_file, 'wb') as f:
             f.write(decrypted_data)
         
-        print(f"✅ File decrypted successfully!")
-        print(f"📁 Output: {output_file}")
+        self._log(f"✅ File decrypted successfully!")
+        self._log(f"📁 Output: {output_file}")
+
+
+class EncryptingWriter(io.RawIOBase):
+    """
+    File-like object untuk enkripsi streaming (mode GCM).
+    Plaintext yang di-write() dienkripsi per segment dan langsung ditulis ke
+    stream tujuan, jadi bisa dipakai di pipeline (tar, pg_dump, gzip, ...)
+    dengan memory terbatas. Stream tujuan tidak ikut ditutup saat close().
+    Container hanya di-seal lewat close() eksplisit (atau with tanpa error);
+    writer yang di-garbage-collect tanpa close() di-abort.
+    """
+    
+    def __init__(self, raw, public_key, encryptor=None):
+        super().__init__()
+        self.raw = raw
+        self.encryptor = encryptor or FileEncryptor(mode='gcm')
+        self.bytes_written = 0
+        self._aes_key = os.urandom(32)
+        self._iv = os.urandom(16)
+        self._recipients = self.encryptor._wrap_for_recipients(public_key, self._aes_key)
+        self._buffer = bytearray()
+        self._index = 0
+        self._offsets = []
+        self._position = 0
+        self._mac = _digest_mac(self._aes_key)
+        self._pool = None
+        self._pending = deque()
+        
+        # Kalau stream bisa di-seek, file_size di header di-patch saat close()
+        self._header_position = raw.tell() if self._raw_seekable() else None
+        raw.write(self._header(UNKNOWN_SIZE))
+    
+    def _raw_seekable(self):
+        try:
+            return self.raw.seekable()
+        except (AttributeError, ValueError):
+            return False
+    
+    def _header(self, file_size):
+        return self.encryptor._pack_header(MODE_GCM, file_size, self._iv,
+                                           self._recipients, flags=self.encryptor._gcm_flags())
+    
+    def writable(self):
+        return True
+    
+    def write(self, b):
+        if self.closed:
+            raise ValueError("write to closed EncryptingWriter")
+        self._buffer += b
+        self.bytes_written += len(b)
+        segment_size = self.encryptor.segment_size
+        # Segment penuh baru di-seal kalau sudah pasti bukan segment terakhir
+        while len(self._buffer) > segment_size:
+            self._submit(0, bytes(self._buffer[:segment_size]))
+            del self._buffer[:segment_size]
+        return len(b)
+    
+    def _submit(self, seg_flags, data):
+        job = (self._aes_key, self._iv, self._index, seg_flags, data,
+               self.encryptor._compression_id())
+        self._index += 1
+        workers = self.encryptor.workers
+        if workers <= 1:
+            self._emit(*_seal_segment(*job))
+            return
+        
+        if self._pool is None:
+            pool_class = (futures.ProcessPoolExecutor if self.encryptor.parallel == 'process'
+                          else futures.ThreadPoolExecutor)
+            self._pool = pool_class(max_workers=workers)
+        self._pending.append(self._pool.submit(_seal_segment, *job))
+        while len(self._pending) >= workers * 2:
+            self._drain_one()
+    
+    def _drain_one(self):
+        self._emit(*self._pending.popleft().result())
+    
+    def _emit(self, seg_flags, sealed, plain_digest):
+        self._mac.update(plain_digest)
+        self._offsets.append(self._position)
+        self.raw.write(SEGMENT_STRUCT.pack(len(sealed), seg_flags))
+        self.raw.write(sealed)
+        self._position += SEGMENT_STRUCT.size + len(sealed)
+    
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._submit(SEG_LAST, bytes(self._buffer))
+            self._buffer = bytearray()
+            while self._pending:
+                self._drain_one()
+            self.encryptor._write_index(self.raw, self._offsets, self._position,
+                                       self.bytes_written, self._mac.digest())
+            if self._header_position is not None:
+                end = self.raw.tell()
+                self.raw.seek(self._header_position)
+                self.raw.write(self._header(self.bytes_written))
+                self.raw.seek(end)
+            self.raw.flush()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+            super().close()
+    
+    def abort(self):
+        """
+        Tutup tanpa segment terakhir & footer: producer gagal di tengah jalan,
+        jadi container sengaja dibiarkan tidak lengkap (dekripsi akan menolak
+        sebagai terpotong) alih-alih terautentikasi sebagai file utuh.
+        """
+        if self.closed:
+            return
+        try:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._buffer = bytearray()
+            self.raw.flush()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+            super().close()
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+    
+    def __del__(self):
+        # IOBase.__del__ memanggil close(), yang akan men-seal container.
+        # Writer yang tidak pernah di-close eksplisit dianggap gagal: abort.
+        try:
+            self.abort()
+        except Exception:
+            pass
+
+
+class DecryptingReader(io.RawIOBase):
+    """
+    File-like object untuk dekripsi streaming.
+    Membaca container dari stream sumber secara berurutan (tidak perlu seek),
+    jadi bisa membaca dari stdin/pipe dengan memory terbatas.
+    """
+    
+    def __init__(self, raw, private_key, encryptor=None):
+        super().__init__()
+        self.raw = raw
+        self.encryptor = encryptor or FileEncryptor()
+        self.header = self.encryptor._read_header(raw)
+        aes_key = self.encryptor._unwrap_header_key(private_key, self.header)
+        
+        if self.header['mode'] == MODE_GCM:
+            compression = _header_compression(self.header)
+            jobs = ((aes_key, self.header['iv'], index, seg_flags, data, compression)
+                    for index, seg_flags, data in self.encryptor._iter_sealed_segments(raw))
+            self._pieces = (plain for _, plain in
+                            self.encryptor._pipeline(_open_segment, jobs))
+        elif self.header['mode'] == MODE_CBC:
+            self._pieces = self._iter_cbc(aes_key)
+        else:
+            raise ValueError(f"Mode container tidak dikenal: {self.header['mode']}")
+        self._view = memoryview(b'')
+        self._pos = 0
+    
+    def _iter_cbc(self, aes_key):
+        decryptor = Cipher(
+            algorithms.AES(aes_key),
+            modes.CBC(self.header['iv']),
+            backend=self.encryptor.backend
+        ).decryptor()
+        remaining = self.header['file_size']
+        ciphertext_left = -(-remaining // 16) * 16
+        mac = _digest_mac(aes_key) if self.header['flags'] & FLAG_DIGEST else None
+        while remaining > 0:
+            chunk = _read_exact(self.raw, min(self.encryptor.chunk_size, ciphertext_left))
+            ciphertext_left -= len(chunk)
+            if not chunk:
+                raise ValueError("Ciphertext terpotong (file rusak?)")
+            data = decryptor.update(chunk)[:remaining]
+            if mac is not None:
+                mac.update(data)
+            yield data
+            remaining -= len(data)
+        # Digest dicek sebelum EOF dilaporkan: pembaca tidak pernah melihat
+        # stream yang "selesai normal" kalau plaintext dimodifikasi
+        if mac is not None and not hmac.compare_digest(_read_exact(self.raw, DIGEST_SIZE),
+                                                       mac.digest()):
+            raise ValueError("Digest plaintext tidak cocok (file rusak atau dimodifikasi)")
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, b):
+        while self._pos >= len(self._view):
+            piece = next(self._pieces, None)
+            if piece is None:
+                return 0
+            self._view = memoryview(piece)
+            self._pos = 0
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+    
+    def close(self):
+        if not self.closed:
+            self._pieces.close()
+        super().close()
+
+
+AGENT_SOCKET_ENV = 'FILE_ENCRYPTOR_AGENT'
+PEERCRED_STRUCT = struct.Struct('3i')  # struct ucred: pid, uid, gid
+
+
+def agent_socket_path():
+    """Lokasi socket key agent: $FILE_ENCRYPTOR_AGENT atau default per user"""
+    path = os.environ.get(AGENT_SOCKET_ENV)
+    if path:
+        return path
+    return os.path.join(tempfile.gettempdir(), f"file_encryptor-{os.getuid()}", "agent.sock")
+
+
+def agent_socket_dir(socket_path):
+    """
+    Buat (kalau belum ada) directory socket agent dan pastikan privat.
+    Lokasi default di /tmp bisa ditebak: directory yang dibuat user lain
+    (atau symlink) berarti socket bisa ditukar, jadi ditolak dengan RuntimeError.
+    """
+    directory = os.path.dirname(socket_path)
+    if not directory:
+        return
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_private_dir(directory)
+
+
+def _check_private_dir(directory):
+    """RuntimeError kalau directory bukan directory asli milik user ini dengan mode 0700"""
+    st = os.lstat(directory)
+    if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+            or stat.S_IMODE(st.st_mode) != 0o700):
+        raise RuntimeError(f"Directory socket {directory} harus milik user ini "
+                           f"dengan permission 0700")
+
+
+def _connect_agent(socket_path):
+    """
+    Connect ke agent setelah memastikan socket memang milik user ini: directory
+    privat (0700), file socket milik uid ini, dan (Linux) proses agent di seberang
+    juga berjalan sebagai uid ini (SO_PEERCRED). Path default bisa ditebak, jadi
+    socket milik user lain ditolak dengan RuntimeError, bukan dipercaya.
+    """
+    _check_private_dir(os.path.dirname(os.path.abspath(socket_path)))
+    st = os.lstat(socket_path)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise RuntimeError(f"Socket agent {socket_path} bukan milik user ini")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        if hasattr(socket, 'SO_PEERCRED'):
+            creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                    PEERCRED_STRUCT.size)
+            _, uid, _ = PEERCRED_STRUCT.unpack(creds)
+            if uid != os.getuid():
+                raise RuntimeError(f"Agent di {socket_path} berjalan sebagai uid {uid}")
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def agent_available(socket_path=None):
+    """
+    Cek apakah key agent milik user ini sedang jalan dan bisa dihubungi.
+    Socket yang gagal pengecekan kepemilikan dianggap tidak ada.
+    """
+    socket_path = socket_path or agent_socket_path()
+    if not os.path.exists(socket_path):
+        return False
+    try:
+        _connect_agent(socket_path).close()
+        return True
+    except (OSError, RuntimeError):
+        return False
+
+
+class _AgentRequestHandler(socketserver.StreamRequestHandler):
+    """Satu koneksi client: request/response JSON per baris"""
+    
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.agent.handle_request(request)
+            except Exception as e:
+                request = {}
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if request.get('op') == 'stop':
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class _AgentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class KeyAgent:
+    """
+    Daemon ala ssh-agent: private key di-load sekali dan disimpan di memory,
+    lalu permintaan unwrap AES key dilayani lewat Unix domain socket.
+    """
+    
+    def __init__(self, private_key, encryptor=None):
+        self.private_key = private_key
+        self.encryptor = encryptor or FileEncryptor(key_cache_size=1024)
+        self.public_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode('ascii')
+    
+    def handle_request(self, request):
+        op = request.get('op')
+        if op == 'unwrap':
+            encrypted_aes_key = base64.b64decode(request['key'])
+            aes_key = self.encryptor._unwrap_key(self.private_key, encrypted_aes_key)
+            return {'ok': True, 'key': base64.b64encode(aes_key).decode('ascii')}
+        if op == 'public_key':
+            return {'ok': True, 'pem': self.public_pem}
+        if op in ('ping', 'stop'):
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown op: {op}"}
+    
+    def serve(self, socket_path=None):
+        """Jalankan agent (blocking) sampai menerima op 'stop'"""
+        socket_path = socket_path or agent_socket_path()
+        agent_socket_dir(socket_path)
+        if os.path.exists(socket_path):
+            if agent_available(socket_path):
+                raise RuntimeError(f"Agent sudah jalan di {socket_path}")
+            os.remove(socket_path)
+        
+        # Socket hanya bisa diakses pemilik (0600)
+        old_umask = os.umask(0o177)
+        try:
+            server = _AgentServer(socket_path, _AgentRequestHandler)
+        finally:
+            os.umask(old_umask)
+        server.agent = self
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+class AgentPrivateKey:
+    """
+    Pengganti private key yang meneruskan operasi decrypt ke key agent.
+    Bisa dipakai di semua API FileEncryptor yang menerima private_key.
+    """
+    
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or agent_socket_path()
+        self._public_key = None
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+    
+    def _call(self, request):
+        with self._lock:
+            if self._sock is None:
+                self._sock = _connect_agent(self.socket_path)
+                self._file = self._sock.makefile('rwb')
+            self._file.write(json.dumps(request).encode('utf-8') + b'\n')
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError("Key agent menutup koneksi")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise ValueError(f"Key agent error: {response.get('error')}")
+        return response
+    
+    def decrypt(self, ciphertext, padding=None):
+        """Unwrap AES key lewat agent (selalu RSA-OAEP SHA-256 seperti _unwrap_key)"""
+        response = self._call({'op': 'unwrap', 'key': base64.b64encode(ciphertext).decode('ascii')})
+        return base64.b64decode(response['key'])
+    
+    def public_key(self):
+        if self._public_key is None:
+            response = self._call({'op': 'public_key'})
+            self._public_key = serialization.load_pem_public_key(response['pem'].encode('ascii'))
+        return self._public_key
+    
+    def stop_agent(self):
+        self._call({'op': 'stop'})
+        self.close()
+    
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._file.close()
+                self._sock.close()
+                self._sock = self._file = None
 
 
 def main():
-    encryptor = FileEncryptor()
-    
-    print("=" * 60)
-    print("🔐 FILE ENCRYPTOR - Trapdoor Function Demo")
-    print("=" * 60)
-    
-    if len(sys.argv) < 2:
-        print("\nUsage:")
-        print("  1. Generate keys:")
-        print("     python file_encryptor.py generate")
-        print("\n  2. Encrypt file:")
-        print("     python file_encryptor.py encrypt <input_file> <output_file>")
-        print("\n  3. Decrypt file:")
-        print("     python file_encryptor.py decrypt <encrypted_file> <output_file>")
+    parser = argparse.ArgumentParser(
+        description='File Encryptor - Trapdoor Function Demo (RSA + AES)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Modes:
+  cbc  - AES-CBC stream, satu core [DEFAULT]
+  gcm  - AES-GCM per segment (terautentikasi), bisa paralel multi-core
+
+Examples:
+  python file_encryptor.py generate
+  python file_encryptor.py generate --tenants-file tenants.txt -o keys --key-size 4096 -w 16 \
+      --passphrase-out ~/secrets/passphrases.json
+  python file_encryptor.py rewrap ./acme --old-key keys/acme/private_key.pem \
+      --passphrase-file acme.pass -n new_public.pem
+  python file_encryptor.py encrypt myfile.txt myfile.enc
+  python file_encryptor.py encrypt --mode gcm --workers 8 big.iso big.enc
+  python file_encryptor.py encrypt --mode gcm --compress zstd app.log app.log.enc
+  python file_encryptor.py encrypt -r team_a.pem -r team_b.pem report.pdf report.enc
+  python file_encryptor.py encrypt --incremental vm.img vm.img.store
+  python file_encryptor.py decrypt vm.img.store vm.img
+  python file_encryptor.py decrypt --workers 8 big.enc big.iso
+  python file_encryptor.py range big.enc 1048576 4096 slice.bin
+  python file_encryptor.py decrypt-batch ./backup -o ./restored
+  python -m file_encryptor batch jobs.jsonl -o results.jsonl
+  python file_encryptor.py verify ./archive -w 8
+  python file_encryptor.py rewrap ./archive --new-key new_public.pem -w 16
+  python file_encryptor.py agent --daemon
+  tar c dir | python file_encryptor.py encrypt - dir.tar.enc
+  python file_encryptor.py decrypt dir.tar.enc - | tar x
+  python file_encryptor.py encrypt -q --metrics metrics.jsonl big.iso big.enc
+        '''
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    
+    generate_parser = subparsers.add_parser('generate', help='Generate RSA key pair(s)')
+    generate_parser.add_argument('--key-size', type=int, default=2048,
+                                 help='RSA key size in bits (default: 2048)')
+    generate_parser.add_argument('--tenants', nargs='+', metavar='NAME',
+                                 help='Bulk mode: one key pair per tenant directory')
+    generate_parser.add_argument('--tenants-file', metavar='FILE',
+                                 help='Bulk mode: tenant names, one per line')
+    generate_parser.add_argument('-o', '--output-dir', default='keys',
+                                 help='Bulk mode output directory (default: keys)')
+    generate_parser.add_argument('--passphrases', metavar='FILE',
+                                 help='JSON {tenant: passphrase}; missing ones are random')
+    generate_parser.add_argument('--passphrase-out', metavar='FILE',
+                                 help='Bulk mode, required: where to write passphrases '
+                                      '(keep it away from OUTPUT_DIR; - = stdout)')
+    
+    encrypt_parser = subparsers.add_parser('encrypt', help='Encrypt file')
+    encrypt_parser.add_argument('input_file')
+    encrypt_parser.add_argument('output_file')
+    encrypt_parser.add_argument('--mode', choices=['cbc', 'gcm'], default='cbc',
+                                help='Encryption mode (default: cbc)')
+    encrypt_parser.add_argument('-c', '--compress', choices=list(COMPRESSION_IDS), default='none',
+                                help='Compress segments before encryption, gcm mode only '
+                                     '(default: none)')
+    encrypt_parser.add_argument('-r', '--recipient', action='append', metavar='PUBLIC_KEY_PEM',
+                                help='Recipient public key, repeatable (default: public_key.pem)')
+    encrypt_parser.add_argument('--incremental', action='store_true',
+                                help='OUTPUT_FILE is a chunk store directory; only changed '
+                                     'chunks are rewritten on later runs')
+    
+    decrypt_parser = subparsers.add_parser('decrypt', help='Decrypt file')
+    decrypt_parser.add_argument('input_file')
+    decrypt_parser.add_argument('output_file')
+    
+    range_parser = subparsers.add_parser('range', help='Decrypt only a byte range')
+    range_parser.add_argument('input_file')
+    range_parser.add_argument('offset', type=int)
+    range_parser.add_argument('length', type=int)
+    range_parser.add_argument('output_file')
+    
+    batch_parser = subparsers.add_parser('decrypt-batch',
+                                         help='Decrypt many files/directories, key loaded once')
+    batch_parser.add_argument('inputs', nargs='+', help='Encrypted files or directories')
+    batch_parser.add_argument('-o', '--output-dir', required=True)
+    batch_parser.add_argument('--cache-size', type=int, default=1024,
+                              help='Unwrapped key LRU cache size (default: 1024)')
+    
+    jobs_parser = subparsers.add_parser('batch',
+                                        help='Run a JSONL manifest of encrypt/decrypt/shred jobs '
+                                             'in one process')
+    jobs_parser.add_argument('manifest', nargs='?', default='-',
+                             help='JSONL job manifest (default: - = stdin)')
+    jobs_parser.add_argument('--mode', choices=['cbc', 'gcm'], default='cbc',
+                             help='Default encryption mode for encrypt jobs (default: cbc)')
+    jobs_parser.add_argument('-c', '--compress', choices=list(COMPRESSION_IDS), default='none',
+                             help='Default compression for encrypt jobs, gcm mode only '
+                                  '(default: none)')
+    jobs_parser.add_argument('-r', '--recipient', action='append', metavar='PUBLIC_KEY_PEM',
+                             help='Default recipient public key, repeatable '
+                                  '(default: public_key.pem)')
+    jobs_parser.add_argument('--private-key', metavar='PRIVATE_KEY_PEM',
+                             help='Default private key for decrypt jobs '
+                                  '(default: agent or private_key.pem)')
+    jobs_parser.add_argument('-o', '--results', metavar='FILE',
+                             help='Write per-job results as JSON lines to FILE (default: stdout)')
+    
+    verify_parser = subparsers.add_parser('verify',
+                                          help='Check container integrity without writing plaintext')
+    verify_parser.add_argument('paths', nargs='+', help='Encrypted files or directories')
+    
+    rewrap_parser = subparsers.add_parser('rewrap',
+                                          help='Rotate keys by rewriting container headers only')
+    rewrap_parser.add_argument('paths', nargs='+', help='Encrypted files or directories')
+    rewrap_parser.add_argument('-n', '--new-key', action='append', required=True,
+                               metavar='PUBLIC_KEY_PEM', help='New recipient public key, repeatable')
+    rewrap_parser.add_argument('--old-key', metavar='PRIVATE_KEY_PEM',
+                               help='Old private key (default: agent or private_key.pem)')
+    
+    agent_parser = subparsers.add_parser('agent',
+                                         help='Run key agent holding the private key in memory')
+    agent_parser.add_argument('--socket', help=f'Socket path (default: ${AGENT_SOCKET_ENV} '
+                                               'or per-user temp dir)')
+    agent_parser.add_argument('--daemon', action='store_true', help='Run in background')
+    agent_parser.add_argument('--stop', action='store_true', help='Stop running agent')
+    
+    for sub in (generate_parser, encrypt_parser, decrypt_parser, range_parser, batch_parser,
+                jobs_parser, verify_parser, rewrap_parser):
+        sub.add_argument('-w', '--workers', type=int, default=1,
+                         help='Parallel workers for gcm mode / bulk generate (default: 1)')
+        sub.add_argument('--parallel', choices=['process', 'thread'], default='process',
+                         help='Worker pool type (default: process)')
+    for sub in (generate_parser, encrypt_parser, decrypt_parser, range_parser, batch_parser,
+                jobs_parser, verify_parser, rewrap_parser, agent_parser):
+        sub.add_argument('--passphrase-file', metavar='FILE',
+                         help=f'Private key passphrase (default: ${PASSPHRASE_ENV} '
+                              'or the demo passphrase)')
+    for sub in subparsers.choices.values():
+        sub.add_argument('-q', '--quiet', action='store_true', help='Only print errors (to stderr)')
+        sub.add_argument('--metrics', metavar='FILE',
+                         help='Append per-phase timings/events as JSON lines to FILE')
+        sub.add_argument('--progress', action='store_true', help='Show progress bar')
+    
+    args = parser.parse_args()
+    
+    # Mode pipe: data lewat stdin/stdout, pesan status dipindah ke stderr
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    if '-' in (getattr(args, 'input_file', None), getattr(args, 'output_file', None)):
+        sys.stdout = sys.stderr
+    elif args.command == 'batch' and not args.results:
+        sys.stdout = sys.stderr  # stdout khusus untuk hasil JSON lines
+    elif getattr(args, 'passphrase_out', None) == '-':
+        sys.stdout = sys.stderr  # stdout khusus untuk JSON passphrase
+    
+    observer = build_observer(quiet=getattr(args, 'quiet', False),
+                              metrics_path=getattr(args, 'metrics', None),
+                              show_progress=getattr(args, 'progress', False))
+    log = observer.message
+    log("=" * 60)
+    log("🔐 FILE ENCRYPTOR - Trapdoor Function Demo")
+    log("=" * 60)
+    
+    if not args.command:
+        parser.print_help()
         return
     
-    command = sys.argv[1]
+    encryptor = FileEncryptor(
+        mode=getattr(args, 'mode', 'cbc'),
+        workers=getattr(args, 'workers', 1),
+        parallel=getattr(args, 'parallel', 'process'),
+        key_cache_size=getattr(args, 'cache_size', 0),
+        compression=getattr(args, 'compress', 'none'),
+        observer=observer
+    )
+    encryptor.passphrase = load_passphrase(getattr(args, 'passphrase_file', None))
     
-    if command == "generate":
+    try:
+        return _run_command(args, encryptor, stdin, stdout)
+    finally:
+        observer.close()
+
+
+def _run_command(args, encryptor, stdin, stdout):
+    log = encryptor._log
+    if args.command == "generate" and (args.tenants or args.tenants_file):
+        # Bulk provisioning: satu directory + passphrase per tenant
+        if not args.passphrase_out:
+            # Default lama (OUTPUT_DIR/passphrases.json) menaruh passphrase di
+            # sebelah private key yang dilindunginya
+            log("❌ Error: --passphrase-out is required for bulk generate "
+                "(a file outside OUTPUT_DIR, or - for stdout)", 'error')
+            return 1
+        tenants = list(args.tenants or [])
+        if args.tenants_file:
+            with open(args.tenants_file) as f:
+                tenants += [line.strip() for line in f if line.strip()]
+        passphrases = {}
+        if args.passphrases:
+            with open(args.passphrases) as f:
+                passphrases = {tenant: value.encode() for tenant, value in json.load(f).items()}
+        
+        try:
+            result = encryptor.generate_key_pairs(tenants, args.output_dir, args.key_size,
+                                                  passphrases)
+        except ValueError as e:
+            # Tenant sudah ada / nama duplikat / tidak valid: tidak ada key yang dibuat
+            log(f"❌ Error: {e}", 'error')
+            return 1
+        generated = {tenant: value.decode() for tenant, value in result['passphrases'].items()}
+        if args.passphrase_out == '-':
+            stdout.write(json.dumps(generated, indent=2, sort_keys=True).encode() + b'\n')
+            stdout.flush()
+            return
+        passphrase_path = args.passphrase_out
+        saved = {}
+        if os.path.exists(passphrase_path) and os.path.getsize(passphrase_path):
+            with open(passphrase_path) as f:
+                saved = json.load(f)  # tenant dari run sebelumnya jangan hilang
+        saved.update(generated)
+        fd = os.open(passphrase_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)  # file lama mungkin masih world-readable
+        with os.fdopen(fd, 'w') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+        log(f"🔒 Passphrases saved to: {passphrase_path}")
+        log("⚠️  Pindahkan file passphrase ke secret store lalu hapus dengan secure_delete.py!",
+            'warning')
+    
+    elif args.command == "generate":
         # Generate key pair
-        private_key, public_key = encryptor.generate_key_pair()
+        private_key, public_key = encryptor.generate_key_pair(args.key_size)
         encryptor.save_keys(private_key, public_key)
-        print("\n💡 Penjelasan Trapdoor Function:")
-        print("   - Public key (🔓): Siapa saja bisa enkripsi (MUDAH)")
-        print("   - Private key (🔒): Hanya pemilik bisa dekripsi (BUTUH SECRET)")
-        print("   - Tanpa private key, dekripsi hampir MUSTAHIL!")
-    
-    elif command == "encrypt":
-        if len(sys.argv) < 4:
-            print("❌ Error: Specify input and output files")
-            print("   Example: python file_encryptor.py encrypt myfile.txt myfile.enc")
+        log("\n💡 Penjelasan Trapdoor Function:")
+        log("   - Public key (🔓): Siapa saja bisa enkripsi (MUDAH)")
+        log("   - Private key (🔒): Hanya pemilik bisa dekripsi (BUTUH SECRET)")
+        log("   - Tanpa private key, dekripsi hampir MUSTAHIL!")
+    
+    elif args.command == "encrypt":
+        if args.input_file != '-' and not os.path.exists(args.input_file):
+            log(f"❌ Error: File '{args.input_file}' not found", 'error')
             return
         
-        input_file = sys.argv[2]
-        output_file = sys.argv[3]
+        if args.compress != 'none' and args.mode != 'gcm' and '-' not in (args.input_file,
+                                                                          args.output_file):
+            log("❌ Error: --compress requires --mode gcm", 'error')
+            return
         
-        if not os.path.exists(input_file):
-            print(f"❌ Error: File '{input_file}' not found")
+        # Load public key (satu atau beberapa penerima)
+        recipient_paths = args.recipient or ["public_key.pem"]
+        for path in recipient_paths:
+            if not os.path.exists(path):
+                log(f"❌ Error: Public key '{path}' not found. Run 'generate' first.", 'error')
+                return
+        
+        public_key = [encryptor.load_public_key(path) for path in recipient_paths]
+        if args.incremental:
+            if '-' in (args.input_file, args.output_file):
+                log("❌ Error: --incremental needs a regular input file and store directory", 'error')
+                return
+            private_key = None
+            if encryptor.is_incremental_store(args.output_file):
+                # Manifest lama dibaca dengan private key (agent atau private_key.pem)
+                if not os.path.exists("private_key.pem") and not agent_available():
+                    log("❌ Error: Private key needed to update an existing store.", 'error')
+                    return
+                private_key = encryptor.load_private_key()
+            encryptor.encrypt_incremental(args.input_file, args.output_file, public_key,
+                                          private_key)
+        elif '-' in (args.input_file, args.output_file):
+            fin = stdin if args.input_file == '-' else open(args.input_file, 'rb')
+            fout = stdout if args.output_file == '-' else open(args.output_file, 'wb')
+            with fin, fout:
+                encryptor.encrypt_stream(fin, fout, public_key)
+        else:
+            encryptor.encrypt_file(args.input_file, args.output_file, public_key)
+    
+    elif args.command == "decrypt":
+        if args.input_file != '-' and not os.path.exists(args.input_file):
+            log(f"❌ Error: File '{args.input_file}' not found", 'error')
             return
         
-        # Load public key
-        if not os.path.exists("public_key.pem"):
-            print("❌ Error: Public key not found. Run 'generate' first.")
+        # Load private key
+        if not os.path.exists("private_key.pem") and not agent_available():
+            log("❌ Error: Private key not found. Run 'generate' first.", 'error')
             return
         
-        public_key = encryptor.load_public_key()
-        encryptor.encrypt_file(input_file, output_file, public_key)
+        private_key = encryptor.load_private_key()
+        if '-' in (args.input_file, args.output_file):
+            fin = stdin if args.input_file == '-' else open(args.input_file, 'rb')
+            fout = stdout if args.output_file == '-' else open(args.output_file, 'wb')
+            with fin, fout:
+                encryptor.decrypt_stream(fin, fout, private_key)
+        elif encryptor.is_incremental_store(args.input_file):
+            encryptor.decrypt_incremental(args.input_file, args.output_file, private_key)
+        else:
+            encryptor.decrypt_file(args.input_file, args.output_file, private_key)
     
-    elif command == "decrypt":
-        if len(sys.argv) < 4:
-            print("❌ Error: Specify input and output files")
-            print("   Example: python file_encryptor.py decrypt myfile.enc myfile_decrypted.txt")
+    elif args.command == "range":
+        if not os.path.exists(args.input_file):
+            log(f"❌ Error: File '{args.input_file}' not found", 'error')
             return
         
-        input_file = sys.argv[2]
-        output_file = sys.argv[3]
-        
-        if not os.path.exists(input_file):
-            print(f"❌ Error: File '{input_file}' not found")
+        if not os.path.exists("private_key.pem") and not agent_available():
+            log("❌ Error: Private key not found. Run 'generate' first.", 'error')
             return
         
-        # Load private key
-        if not os.path.exists("private_key.pem"):
-            print("❌ Error: Private key not found. Run 'generate' first.")
+        private_key = encryptor.load_private_key()
+        data = encryptor.decrypt_range(args.input_file, args.offset, args.length, private_key)
+        with open(args.output_file, 'wb') as f:
+            f.write(data)
+        log(f"✅ Decrypted {len(data):,} bytes from offset {args.offset:,}")
+        log(f"📁 Output: {args.output_file}")
+    
+    elif args.command == "decrypt-batch":
+        if not os.path.exists("private_key.pem") and not agent_available():
+            log("❌ Error: Private key not found. Run 'generate' first.", 'error')
             return
         
         private_key = encryptor.load_private_key()
-        encryptor.decrypt_file(input_file, output_file, private_key)
+        encryptor.decrypt_batch(args.inputs, args.output_dir, private_key)
+    
+    elif args.command == "batch":
+        if args.manifest != '-' and not os.path.exists(args.manifest):
+            log(f"❌ Error: Manifest '{args.manifest}' not found", 'error')
+            return 1
+        
+        results = open(args.results, 'a', buffering=1) if args.results else None
+        
+        def emit(result):
+            line = json.dumps(result) + '\n'
+            if results:
+                results.write(line)
+            else:
+                stdout.write(line.encode())
+                stdout.flush()
+        
+        manifest = (io.TextIOWrapper(stdin, encoding='utf-8') if args.manifest == '-'
+                    else open(args.manifest, encoding='utf-8'))
+        try:
+            with manifest:
+                counts = encryptor.run_batch(manifest, emit, args.recipient, args.private_key)
+        finally:
+            if results:
+                results.close()
+        return 1 if counts['failed'] else 0
     
-    else:
-        print(f"❌ Unknown command: {command}")
+    elif args.command == "verify":
+        if not os.path.exists("private_key.pem") and not agent_available():
+            log("❌ Error: Private key not found. Run 'generate' first.", 'error')
+            return 1
+        
+        private_key = encryptor.load_private_key()
+        if len(args.paths) == 1 and os.path.isfile(args.paths[0]):
+            # Satu file: worker dipakai untuk segment di dalam file
+            try:
+                result = encryptor.verify_file(args.paths[0], private_key)
+            except (OSError, ValueError) as e:
+                log(f"❌ Error: {args.paths[0]}: {e}", 'error')
+                return 1
+            log(f"✅ OK: {result['bytes']:,} bytes ({result['mode']}, "
+                f"{'digest verified' if result['digest'] else 'size only, no digest'})")
+            return 0
+        results = encryptor.verify_tree(args.paths, private_key)
+        return 1 if results['failed'] else 0
+    
+    elif args.command == "rewrap":
+        old_key_path = args.old_key or "private_key.pem"
+        if not os.path.exists(old_key_path) and (args.old_key or not agent_available()):
+            log(f"❌ Error: Private key '{old_key_path}' not found.", 'error')
+            return
+        for path in args.new_key:
+            if not os.path.exists(path):
+                log(f"❌ Error: Public key '{path}' not found.", 'error')
+                return
+        
+        old_private_key = encryptor.load_private_key(args.old_key)
+        new_public_keys = [encryptor.load_public_key(path) for path in args.new_key]
+        encryptor.rewrap_tree(args.paths, old_private_key, new_public_keys)
+    
+    elif args.command == "agent":
+        socket_path = args.socket or agent_socket_path()
+        if args.stop:
+            if not agent_available(socket_path):
+                log(f"❌ Error: No agent running at {socket_path}", 'error')
+                return
+            AgentPrivateKey(socket_path).stop_agent()
+            log("✅ Agent stopped")
+            return
+        
+        if not os.path.exists("private_key.pem"):
+            log("❌ Error: Private key not found. Run 'generate' first.", 'error')
+            return
+        
+        try:
+            agent_socket_dir(socket_path)  # dicek sebelum fork supaya error terlihat
+        except RuntimeError as e:
+            log(f"❌ Error: {e}", 'error')
+            return 1
+        
+        private_key = encryptor.load_private_key(use_agent=False)
+        agent = KeyAgent(private_key)
+        log(f"🔑 Key agent listening on: {socket_path}")
+        log(f"💡 export {AGENT_SOCKET_ENV}={socket_path}")
+        if args.daemon:
+            sys.stdout.flush()
+            if os.fork() > 0:
+                return
+            os.setsid()
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(devnull, fd)
+        agent.serve(socket_path)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Observer / metrics untuk FileEncryptor dan SecureFileShredder
+Menggantikan print langsung: pesan status, progress (rate-limited) dan
+timing per fase dikirim ke observer, jadi bisa ditampilkan di terminal,
+dibungkam (quiet), atau ditulis sebagai JSON lines untuk monitoring.
+Hanya memakai standard library.
+"""
+
+import sys
+import json
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Observer:
+    """
+    Interface observer (semua method no-op, jadi diam secara default).
+    - message: pesan status untuk manusia (level 'info', 'warning', 'error')
+    - progress: dipanggil sering (per chunk), implementasi wajib rate-limit sendiri
+    - phase: satu fase selesai, dengan durasi dan jumlah byte
+    - event: ringkasan (misal file selesai dienkripsi / di-shred)
+    """
+
+    def message(self, text, level='info'):
+        pass
+
+    def progress(self, label, done, total):
+        pass
+
+    def phase(self, name, seconds, nbytes=0, **fields):
+        pass
+
+    def event(self, name, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+class ConsoleObserver(Observer):
+    """Tampilkan pesan dan progress bar di terminal"""
+
+    def __init__(self, stream=None, show_progress=True, quiet=False, interval=0.1):
+        self.stream = stream
+        self.show_progress = show_progress
+        self.quiet = quiet  # quiet: hanya error (ke stderr)
+        self.interval = interval  # jarak minimal antar redraw progress bar (detik)
+        self._last_draw = 0.0
+
+    def _out(self):
+        # Resolve saat dipakai, supaya redirect sys.stdout (mode pipe) ikut berlaku
+        return self.stream or sys.stdout
+
+    def message(self, text, level='info'):
+        if self.quiet:
+            if level == 'error':
+                print(text, file=sys.stderr)
+            return
+        print(text, file=self._out())
+
+    def progress(self, label, done, total):
+        if self.quiet or not self.show_progress:
+            return
+        finished = done >= total
+        now = time.monotonic()
+        if not finished and now - self._last_draw < self.interval:
+            return
+        self._last_draw = now
+
+        percent = (done / total) * 100 if total else 100.0
+        bar_length = 40
+        filled = int(bar_length * percent / 100)
+        bar = '█' * filled + '░' * (bar_length - filled)
+        out = self._out()
+        print(f'\r  {label}: [{bar}] {percent:.1f}%', end='', file=out, flush=True)
+        if finished:
+            print(file=out)
+            self._last_draw = 0.0
+
+
+class JsonLinesMetrics(Observer):
+    """Tulis phase & event sebagai JSON lines (satu objek per baris) ke file/stream"""
+
+    def __init__(self, target):
+        if hasattr(target, 'write'):
+            self.stream = target
+            self._owns_stream = False
+        else:
+            self.stream = open(target, 'a', buffering=1)
+            self._owns_stream = True
+        self._lock = threading.Lock()  # phase bisa dilapor dari beberapa thread
+
+    def _write(self, record):
+        record['ts'] = time.time()
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self.stream.write(line)
+
+    def phase(self, name, seconds, nbytes=0, **fields):
+        record = {'type': 'phase', 'phase': name, 'seconds': seconds, 'bytes': nbytes}
+        if nbytes and seconds > 0:
+            record['mb_per_s'] = nbytes / (1024 * 1024) / seconds
+        record.update(fields)
+        self._write(record)
+
+    def event(self, name, **fields):
+        record = {'type': 'event', 'event': name}
+        record.update(fields)
+        self._write(record)
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class MultiObserver(Observer):
+    """Teruskan semua notifikasi ke beberapa observer sekaligus"""
+
+    def __init__(self, observers):
+        self.observers = list(observers)
+
+    def message(self, text, level='info'):
+        for observer in self.observers:
+            observer.message(text, level)
+
+    def progress(self, label, done, total):
+        for observer in self.observers:
+            observer.progress(label, done, total)
+
+    def phase(self, name, seconds, nbytes=0, **fields):
+        for observer in self.observers:
+            observer.phase(name, seconds, nbytes, **fields)
+
+    def event(self, name, **fields):
+        for observer in self.observers:
+            observer.event(name, **fields)
+
+    def close(self):
+        for observer in self.observers:
+            observer.close()
+
+
+class PhaseTimer:
+    """
+    Akumulasi durasi & byte per fase (misal read/aes/write per chunk),
+    lalu dilaporkan sekali ke observer di akhir operasi.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.bytes = defaultdict(int)
+
+    @contextmanager
+    def measure(self, name, nbytes=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.bytes[name] += nbytes
+
+    def add(self, name, seconds, nbytes=0):
+        self.seconds[name] += seconds
+        self.bytes[name] += nbytes
+
+    def report(self, observer, **fields):
+        for name, seconds in self.seconds.items():
+            observer.phase(name, seconds, self.bytes[name], **fields)
+
+
+def build_observer(quiet=False, metrics_path=None, show_progress=True):
+    """Observer standar untuk CLI: console (atau quiet) + JSON lines opsional"""
+    console = ConsoleObserver(show_progress=show_progress, quiet=quiet)
+    if not metrics_path:
+        return console
+    return MultiObserver([console, JsonLinesMetrics(metrics_path)])
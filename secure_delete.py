@@ -8,53 +8,545 @@ import os
 import sys
 import random
 import hashlib
+import json
+import struct
+import time
+import errno
+import itertools
+import mmap
+import signal
+import threading
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
 import argparse
+from metrics import ConsoleObserver, build_observer
+
+# concurrent.futures & cryptography di-import saat dipakai (startup --help tetap cepat)
+_aes_ctr_cipher = None  # None = belum dicoba, False = cryptography tidak terpasang
+
+
+def _load_aes_ctr():
+    """
+    Opsional: keystream AES-CTR jauh lebih cepat dari os.urandom per block.
+    Return fungsi (key, nonce) -> encryptor, atau False tanpa paket cryptography.
+    """
+    global _aes_ctr_cipher
+    if _aes_ctr_cipher is None:
+        try:
+            from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        except ImportError:
+            _aes_ctr_cipher = False
+        else:
+            _aes_ctr_cipher = lambda key, nonce: Cipher(algorithms.AES(key),
+                                                        modes.CTR(nonce)).encryptor()
+    return _aes_ctr_cipher
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024  # 1MB per write
+DIRECT_ALIGN = 4096  # O_DIRECT: alamat buffer, offset & panjang write kelipatan 4KB
+UNKNOWN_END = 1 << 63  # ukuran akhir file belum diketahui (fill file masih tumbuh)
+
+# Shred directory: file kecil dikumpulkan per batch (per device) supaya fsync
+# dan fsync directory cukup sekali per pass / per batch
+SMALL_FILE_SIZE = 256 * 1024
+BATCH_FILES = 64
+BATCH_BYTES = 8 * 1024 * 1024
+DEFAULT_DIR_WORKERS = 8
+DEFAULT_DEVICE_WORKERS = 4  # maksimal worker yang menulis ke satu device (st_dev)
+
+# Wipe free space: beberapa fill file ditulis paralel dengan block besar sampai
+# free space tinggal headroom (supaya sistem tidak kehabisan disk), lalu dihapus
+FILL_BLOCK_SIZE = 8 * 1024 * 1024
+FILL_FILE_SIZE = 1024 ** 3  # per fill file, aman untuk filesystem dengan batas 4GB (FAT32)
+DEFAULT_FREE_SPACE_RESERVE = 256 * 1024 * 1024
+
+# Container FileEncryptor (format lihat file_encryptor.py): AES key yang di-wrap RSA
+# ada di header (dipad ke kelipatan 4KB). Header hilang = ciphertext tidak bisa
+# didekripsi lagi, jadi crypto-erase cukup menimpa header. Di-parse sendiri di sini
+# supaya secure_delete.py tidak wajib paket cryptography.
+CONTAINER_MAGIC = b'FENC'
+CONTAINER_HEADER_STRUCT = struct.Struct('>4sBBHIQI16sH')
+CONTAINER_VERSIONS = (1, 2)
+CONTAINER_MODES = (1, 2)  # cbc, gcm
+CONTAINER_HEADER_ALIGN = 4096  # header versi 2 selalu dipad ke kelipatan 4KB
+STORE_MANIFEST = 'manifest.fenc'  # store incremental: key chunk ada di manifest
+STORE_CHUNKS = 'chunks'
+
+DEFAULT_CHECKPOINT_INTERVAL = 10.0  # detik antar checkpoint journal per file
+JOURNAL_SUFFIX = '.shred-journal'
+
+GUTMANN_PATTERNS = [
+    'random', 'random', 'random', 'random',  # Pass 1-4: Random
+    b'\x55', b'\xaa',  # Pass 5-6: Alternating bits
+    b'\x92\x49\x24', b'\x49\x24\x92', b'\x24\x92\x49',  # Pass 7-9: Special patterns
+    b'\x00', b'\x11', b'\x22', b'\x33', b'\x44',  # Pass 10-14
+    b'\x55', b'\x66', b'\x77', b'\x88', b'\x99',  # Pass 15-19
+    b'\xaa', b'\xbb', b'\xcc', b'\xdd', b'\xee',  # Pass 20-24
+    b'\xff', b'\x92\x49\x24', b'\x49\x24\x92',  # Pass 25-27
+    b'\x24\x92\x49', b'\x6d\xb6\xdb', b'\xb6\xdb\x6d',  # Pass 28-30
+    b'\xdb\x6d\xb6',  # Pass 31
+    'random', 'random', 'random', 'random'  # Pass 32-35: Random
+]
+
+
+def _write_all(fd, view):
+    """os.write sampai semua byte tertulis (write ke file bisa parsial)"""
+    while len(view):
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _data_extents(fd, file_size):
+    """
+    Daftar (offset, panjang) region yang benar-benar teralokasi, lewat
+    SEEK_DATA/SEEK_HOLE. Hole di sparse file tidak perlu ditimpa (tidak ada
+    data lama di sana) dan kalau ditulis malah membuat file membengkak.
+    Filesystem/platform tanpa dukungan: seluruh file dianggap data.
+    """
+    if not hasattr(os, 'SEEK_DATA'):
+        return [(0, file_size)] if file_size else []
+    extents = []
+    offset = 0
+    try:
+        while offset < file_size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:
+                    break  # tidak ada data lagi sampai EOF
+                raise
+            if start >= file_size:
+                break
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), file_size)
+            extents.append((start, end - start))
+            offset = end
+    except OSError:
+        return [(0, file_size)] if file_size else []
+    return extents
+
+
+def _container_header_size(fd, file_size):
+    """Panjang header container FileEncryptor di fd, atau None kalau bukan container"""
+    fixed = os.pread(fd, CONTAINER_HEADER_STRUCT.size, 0)
+    if len(fixed) < CONTAINER_HEADER_STRUCT.size or not fixed.startswith(CONTAINER_MAGIC):
+        return None
+    (_, version, mode, _, header_size, _, _, _,
+     key_block_len) = CONTAINER_HEADER_STRUCT.unpack(fixed)
+    # File biasa yang kebetulan diawali 'FENC' harus tetap di-shred penuh:
+    # cek semua field yang selalu valid di container asli
+    if version not in CONTAINER_VERSIONS or mode not in CONTAINER_MODES or not key_block_len:
+        return None
+    if not CONTAINER_HEADER_STRUCT.size + key_block_len <= header_size <= file_size:
+        return None
+    if version >= 2 and header_size % CONTAINER_HEADER_ALIGN:
+        return None
+    return header_size
+
+
+def _store_of_chunk(path):
+    """Root store incremental kalau path = <store>/chunks/<xx>/<id>, selain itu None"""
+    bucket = os.path.dirname(path)
+    chunks = os.path.dirname(bucket)
+    if os.path.basename(chunks) != STORE_CHUNKS:
+        return None
+    return os.path.dirname(chunks)
+
+
+def parse_size(text):
+    """'4M' -> 4194304"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def default_journal_path(target):
+    """Journal default: di sebelah target (bukan di dalam directory yang di-shred)"""
+    return os.path.abspath(target).rstrip(os.sep) + JOURNAL_SUFFIX
+
+
+@contextmanager
+def _terminate_as_interrupt():
+    """
+    Selama blok ini, SIGTERM (kill / systemd stop) diperlakukan seperti Ctrl-C,
+    jadi blok finally tetap jalan. Handler hanya bisa dipasang dari main thread.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt(f"signal {signum}")
+    
+    previous = signal.signal(signal.SIGTERM, interrupt)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+
+def _completed(result):
+    """Bungkus hasil yang sudah ada sebagai Future selesai (untuk collect)"""
+    from concurrent.futures import Future
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class ShredJournal:
+    """
+    Journal checkpoint untuk shred job yang bisa dilanjutkan (--resume).
+    Menyimpan parameter job dan, per file yang sedang dikerjakan, pass dan
+    offset yang sudah pasti di disk (offset dicatat setelah fdatasync).
+    File yang sudah selesai tidak perlu dicatat: file itu sudah terhapus,
+    jadi tidak akan ditemukan lagi saat directory di-scan ulang.
+    Nama file tidak pernah ditulis ke disk (shredder justru me-rename file
+    ke nama acak): path disimpan sebagai keyed BLAKE2b dengan salt per job.
+    """
+    
+    def __init__(self, path, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        self.state = self._new_state(None)
+        self._done = False
+        self._lock = threading.Lock()
+    
+    def _new_state(self, job):
+        salt = os.urandom(16).hex()
+        return {'version': 2, 'salt': salt, 'job': self._job_record(job, salt), 'files': {}}
+    
+    def _key(self, path, salt=None):
+        salt = bytes.fromhex(salt or self.state['salt'])
+        name = os.fsencode(os.path.abspath(path))
+        return hashlib.blake2b(name, key=salt, digest_size=16).hexdigest()
+    
+    def _job_record(self, job, salt):
+        if job is None:
+            return None
+        return dict(job, target=self._key(job['target'], salt))
+    
+    def begin(self, job, resume=False):
+        """Mulai job baru, atau lanjutkan dari journal yang ada kalau resume"""
+        if resume and os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            if state.get('version') != 2 or state.get('job') != self._job_record(job, state['salt']):
+                raise ValueError(f"Journal {self.path} belongs to a different job")
+            self.state = state
+            return True
+        self.state = self._new_state(job)
+        return False
+    
+    def resume_point(self, path, file_size):
+        """(pass, offset) untuk melanjutkan file; (1, 0) kalau belum pernah / ukuran berubah"""
+        entry = self.state['files'].get(self._key(path))
+        if entry and entry['size'] == file_size:
+            return entry['pass'], entry['offset']
+        return 1, 0
+    
+    def record(self, path, file_size, pass_number, offset):
+        """Catat progress yang sudah di-fsync, lalu tulis journal (atomic replace)"""
+        with self._lock:
+            if self._done:
+                return
+            self.state['files'][self._key(path)] = {
+                'size': file_size, 'pass': pass_number, 'offset': offset}
+            self._flush()
+    
+    def finish(self, path):
+        with self._lock:
+            self.state['files'].pop(self._key(path), None)
+    
+    def complete(self, shredder=None):
+        """
+        Job selesai: journal tidak diperlukan lagi. Dengan shredder, journal
+        ditimpa dulu (bukan hanya di-unlink) seperti file lain yang di-shred.
+        """
+        with self._lock:
+            self._done = True
+        for path in (self.path + '.tmp', self.path):  # .tmp hanya ada kalau flush terputus
+            if not os.path.exists(path):
+                continue
+            if shredder is not None:
+                shredder.wipe_private_file(path)
+            else:
+                os.remove(path)
+    
+    def _flush(self):
+        self.state['updated'] = time.time()
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
 
 class SecureFileShredder:
-    def __init__(self):
-        self.chunk_size = 4096  # 4KB per chunk
+    def __init__(self, observer=None, block_size=DEFAULT_BLOCK_SIZE, direct_io=False,
+                 journal=None):
+        self.chunk_size = block_size  # ukuran block per write
+        self.journal = journal  # ShredJournal opsional, untuk checkpoint & --resume
+        # direct_io: tulis dengan O_DIRECT (tanpa page cache); kalau filesystem
+        # tidak mendukung, fallback ke fdatasync + posix_fadvise(DONTNEED) per pass
+        self.direct_io = direct_io
+        # Pesan, progress & metrics lewat observer (lihat metrics.py)
+        self.observer = observer or ConsoleObserver()
+    
+    def _log(self, text='', level='info'):
+        self.observer.message(text, level)
     
     def get_file_size(self, filepath):
         """Dapatkan ukuran file"""
         return os.path.getsize(filepath)
     
-    def overwrite_with_pattern(self, filepath, pattern, pass_number, total_passes):
-        """Timpa file dengan pattern tertentu"""
+    def get_allocated_size(self, filepath):
+        """Byte di region data (yang akan ditimpa); lebih kecil dari ukuran untuk sparse file"""
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            return sum(length for _, length in _data_extents(fd, os.fstat(fd).st_size))
+        finally:
+            os.close(fd)
+    
+    def _log_size(self, filepath):
+        """Tampilkan ukuran (plus alokasi kalau sparse), return ukuran file"""
         file_size = self.get_file_size(filepath)
-        bytes_written = 0
+        allocated = self.get_allocated_size(filepath)
+        if allocated < file_size:
+            self._log(f"   Size: {self._format_size(file_size)} "
+                      f"(allocated {self._format_size(allocated)}, sparse - holes skipped)\n")
+        else:
+            self._log(f"   Size: {self._format_size(file_size)}\n")
+        return file_size
+    
+    def _block_size(self, handle):
+        if not handle['direct']:
+            return self.chunk_size
+        return max(DIRECT_ALIGN, self.chunk_size - self.chunk_size % DIRECT_ALIGN)
+    
+    def _pattern_block(self, pattern, block_size):
+        """
+        Buffer satu block berisi pattern, dibuat sekali per pass lalu dipakai ulang.
+        Panjangnya kelipatan panjang pattern, jadi pattern 3 byte (Gutmann)
+        tetap nyambung antar block. Buffer page-aligned (syarat O_DIRECT).
+        """
+        if pattern == 'zeros':
+            pattern = b'\x00'
+        elif pattern == 'ones':
+            pattern = b'\xff'
+        unit = len(pattern) * (DIRECT_ALIGN if block_size % DIRECT_ALIGN == 0 else 1)
+        size = max(unit, block_size - block_size % unit)
+        buffer = mmap.mmap(-1, size)  # anonim: page-aligned dan sudah berisi nol
+        if pattern != b'\x00':
+            buffer.write(pattern * (size // len(pattern)))
+        return memoryview(buffer)
+    
+    def _random_blocks(self, block_size):
+        """
+        Generator block random (memoryview page-aligned, valid sampai block
+        berikutnya). Pakai keystream AES-256-CTR dengan key/nonce dari
+        os.urandom; tanpa paket cryptography fallback ke os.urandom per block.
+        """
+        out = mmap.mmap(-1, block_size + 15)  # update_into butuh len(data) + block - 1
+        out_view = memoryview(out)[:block_size]
+        aes_ctr = _load_aes_ctr()
+        if not aes_ctr:
+            while True:
+                out_view[:] = os.urandom(block_size)
+                yield out_view
+        keystream = aes_ctr(os.urandom(32), os.urandom(16))
+        zeros = bytes(block_size)
+        while True:
+            keystream.update_into(zeros, out)
+            yield out_view
+    
+    @contextmanager
+    def _overwrite_handle(self, filepath):
+        """
+        Buka file sekali untuk semua pass. Dengan direct_io dicoba O_DIRECT dulu;
+        handle berupa dict {'fd', 'direct', 'path'}, plus 'extents' (region data,
+        dipetakan sekali saat pass pertama) dan titik resume dari journal.
+        """
+        handle = {'fd': None, 'direct': False, 'path': filepath,
+                  'resume_pass': 1, 'resume_offset': 0}
+        if self.direct_io and hasattr(os, 'O_DIRECT'):
+            try:
+                handle['fd'] = os.open(filepath, os.O_RDWR | os.O_DIRECT)
+                handle['direct'] = True
+            except OSError:
+                pass  # misal tmpfs lama: fallback ke page cache + fadvise
+        if handle['fd'] is None:
+            handle['fd'] = os.open(filepath, os.O_RDWR)
+        handle['checkpoint_at'] = time.monotonic()
+        if self.journal is not None:
+            handle['resume_pass'], handle['resume_offset'] = self.journal.resume_point(
+                filepath, os.fstat(handle['fd']).st_size)
+        try:
+            yield handle
+        finally:
+            os.close(handle['fd'])
+    
+    def _fallback_buffered(self, handle):
+        """O_DIRECT ditolak saat write (EINVAL): buka ulang tanpa O_DIRECT"""
+        os.close(handle['fd'])
+        handle['fd'] = os.open(handle['path'], os.O_RDWR)
+        handle['direct'] = False
+        self._log("  ⚠️  O_DIRECT not supported here, using fadvise(DONTNEED) fallback", 'warning')
+    
+    def _pass_blocks(self, pattern, block_size):
+        """Iterator block untuk satu pass (bisa dipakai bersama oleh beberapa file)"""
+        if pattern == 'random':
+            return self._random_blocks(block_size)
+        return itertools.repeat(self._pattern_block(pattern, block_size))
+    
+    def _fit_block_size(self, handle, file_size):
+        """Block tidak perlu lebih besar dari file (dibulatkan ke DIRECT_ALIGN)"""
+        needed = max(DIRECT_ALIGN, -(-file_size // DIRECT_ALIGN) * DIRECT_ALIGN)
+        return min(self._block_size(handle), needed)
+    
+    def _write_block(self, handle, block, chunk_size, offset, file_size):
+        """Tulis chunk_size byte pertama block di posisi fd saat ini (= offset)"""
+        if not handle['direct']:
+            _write_all(handle['fd'], block[:chunk_size])
+            return
+        try:
+            if chunk_size % DIRECT_ALIGN:
+                # Block terakhir: O_DIRECT hanya boleh panjang kelipatan align, jadi
+                # tulis penuh (sekalian menimpa slack block terakhir) lalu truncate
+                padded = chunk_size + DIRECT_ALIGN - chunk_size % DIRECT_ALIGN
+                _write_all(handle['fd'], block[:padded])
+                if offset + chunk_size >= file_size:
+                    os.ftruncate(handle['fd'], file_size)
+            else:
+                _write_all(handle['fd'], block[:chunk_size])
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+            self._fallback_buffered(handle)
+            os.lseek(handle['fd'], offset, os.SEEK_SET)
+            _write_all(handle['fd'], block[:chunk_size])
+    
+    def _overwrite_pass(self, handle, pattern, pass_number, total_passes, file_size,
+                        blocks=None, sync=True, progress=True):
+        """
+        Satu pass overwrite lewat handle yang sudah terbuka.
+        Shred batch memberi blocks bersama dan sync=False (fdatasync dilakukan
+        sekali per pass untuk seluruh batch, lihat _shred_batch).
+        """
+        resume_pass = handle['resume_pass']
+        if pass_number < resume_pass:
+            return  # sudah selesai sebelum job terputus
+        resume_offset = handle['resume_offset'] if pass_number == resume_pass else 0
         
-        with open(filepath, 'rb+') as f:
-            while bytes_written < file_size:
-                chunk_size = min(self.chunk_size, file_size - bytes_written)
-                
-                if pattern == 'random':
-                    data = os.urandom(chunk_size)
-                elif pattern == 'zeros':
-                    data = b'\x00' * chunk_size
-                elif pattern == 'ones':
-                    data = b'\xff' * chunk_size
-                else:
-                    data = pattern * chunk_size
-                
-                f.write(data[:chunk_size])
+        label = f'Pass {pass_number}/{total_passes}'
+        start = time.perf_counter()
+        if 'extents' not in handle:
+            handle['extents'] = _data_extents(handle['fd'], file_size)
+        allocated = sum(length for _, length in handle['extents'])
+        if blocks is None:
+            blocks = self._pass_blocks(pattern, self._fit_block_size(handle, allocated))
+        
+        bytes_written = 0
+        skipped = 0  # sudah ditimpa sebelum job terputus (hanya untuk progress)
+        for offset, length in handle['extents']:
+            end = offset + length
+            if end <= resume_offset:
+                skipped += length
+                continue
+            if offset < resume_offset:
+                skipped += resume_offset - offset
+                offset = resume_offset
+            os.lseek(handle['fd'], offset, os.SEEK_SET)
+            while offset < end:
+                block = next(blocks)
+                chunk_size = min(len(block), end - offset)
+                self._write_block(handle, block, chunk_size, offset, file_size)
+                offset += chunk_size
                 bytes_written += chunk_size
+                self._checkpoint(handle, file_size, pass_number, offset)
                 
-                # Progress bar
-                progress = (bytes_written / file_size) * 100
-                self._print_progress(pass_number, total_passes, progress)
-            
-            f.flush()
-            os.fsync(f.fileno())  # Force write ke disk
+                # Progress (observer yang mengatur rate redraw)
+                if progress:
+                    self.observer.progress(label, skipped + bytes_written, allocated)
+        
+        if progress and allocated == 0:
+            self.observer.progress(label, 0, 0)
         
-        print()  # New line setelah progress bar
+        pattern_name = pattern if isinstance(pattern, str) else pattern.hex()
+        self.observer.phase('overwrite', time.perf_counter() - start, bytes_written,
+                            file=handle['path'], pass_number=pass_number, pattern=pattern_name,
+                            direct=handle['direct'])
+        if sync:
+            fsync_start = time.perf_counter()
+            self._sync_handle(handle)
+            self.observer.phase('fsync', time.perf_counter() - fsync_start,
+                                file=handle['path'], pass_number=pass_number)
+            self._checkpoint(handle, file_size, pass_number + 1, 0)
     
-    def _print_progress(self, pass_num, total_passes, progress):
-        """Cetak progress bar"""
-        bar_length = 40
-        filled = int(bar_length * progress / 100)
-        bar = '█' * filled + '░' * (bar_length - filled)
-        print(f'\r  Pass {pass_num}/{total_passes}: [{bar}] {progress:.1f}%', end='', flush=True)
+    def _checkpoint(self, handle, file_size, pass_number, offset):
+        """
+        Catat progress ke journal paling sering sekali per interval per file.
+        Data di-fdatasync dulu, supaya offset yang tercatat benar-benar sudah
+        tertimpa di disk saat job dilanjutkan.
+        """
+        if self.journal is None:
+            return
+        now = time.monotonic()
+        if now - handle['checkpoint_at'] < self.journal.interval:
+            return
+        if hasattr(os, 'fdatasync'):
+            os.fdatasync(handle['fd'])
+        else:
+            os.fsync(handle['fd'])
+        self.journal.record(handle['path'], file_size, pass_number, offset)
+        handle['checkpoint_at'] = now
+    
+    def _sync_handle(self, handle):
+        fd = handle['fd']
+        if hasattr(os, 'fdatasync'):
+            os.fdatasync(fd)  # Force write ke disk
+        else:
+            os.fsync(fd)
+        if not handle['direct'] and hasattr(os, 'posix_fadvise'):
+            # Buang page cache pass ini supaya tidak menumpuk / mengusir cache lain
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    
+    def overwrite_with_pattern(self, filepath, pattern, pass_number, total_passes, file_size=None):
+        """Timpa file dengan pattern tertentu ('random', 'zeros', 'ones' atau bytes)"""
+        if file_size is None:
+            file_size = self.get_file_size(filepath)
+        with self._overwrite_handle(filepath) as handle:
+            self._overwrite_pass(handle, pattern, pass_number, total_passes, file_size)
+    
+    def _overwrite_passes(self, filepath, passes, file_size):
+        """Jalankan semua pass [(pattern, keterangan), ...] lewat satu file descriptor"""
+        with self._overwrite_handle(filepath) as handle:
+            resume_pass = handle['resume_pass']
+            if resume_pass > 1 or handle['resume_offset']:
+                self._log(f"  ⏭️  Resuming at pass {resume_pass}/{len(passes)}, "
+                          f"offset {self._format_size(handle['resume_offset'])}")
+            for i, (pattern, description) in enumerate(passes, 1):
+                if i < resume_pass:
+                    continue
+                self._log(f"  🔄 Pass {i}/{len(passes)}: {description}...")
+                self._overwrite_pass(handle, pattern, i, len(passes), file_size)
+    
+    def _method_passes(self, method):
+        """Daftar pass [(pattern, keterangan), ...] untuk satu method"""
+        if method == 'dod':
+            return [
+                ('zeros', "Overwriting with zeros"),
+                ('ones', "Overwriting with ones"),
+                ('random', "Overwriting with random data"),
+            ]
+        if method == 'gutmann':
+            return [(pattern, "Random data" if pattern == 'random' else f"Pattern 0x{pattern.hex()}")
+                    for pattern in GUTMANN_PATTERNS]
+        if method == 'quick':
+            return [('random', "Random data")] * 7
+        if method == 'simple':
+            return [('random', "Random data")] * 3
+        raise ValueError(f"Unknown method: {method}")
     
     def dod_method(self, filepath):
         """
@@ -64,24 +556,14 @@ class SecureFileShredder:
         - Pass 3: Random data
         Standard militer AS untuk menghapus data sensitif
         """
-        print("\n🛡️  DoD 5220.22-M Method (3 passes)")
-        print("   Standard US Department of Defense")
-        print(f"   File: {filepath}")
-        print(f"   Size: {self._format_size(self.get_file_size(filepath))}\n")
+        self._log("\n🛡️  DoD 5220.22-M Method (3 passes)")
+        self._log("   Standard US Department of Defense")
+        self._log(f"   File: {filepath}")
+        file_size = self._log_size(filepath)
         
-        # Pass 1: Zeros
-        print("  🔄 Pass 1/3: Overwriting with zeros...")
-        self.overwrite_with_pattern(filepath, 'zeros', 1, 3)
+        self._overwrite_passes(filepath, self._method_passes('dod'), file_size)
         
-        # Pass 2: Ones
-        print("  🔄 Pass 2/3: Overwriting with ones...")
-        self.overwrite_with_pattern(filepath, 'ones', 2, 3)
-        
-        # Pass 3: Random
-        print("  🔄 Pass 3/3: Overwriting with random data...")
-        self.overwrite_with_pattern(filepath, 'random', 3, 3)
-        
-        print("  ✅ DoD overwrite complete!")
+        self._log("  ✅ DoD overwrite complete!")
     
     def gutmann_method(self, filepath):
         """
@@ -89,33 +571,14 @@ class SecureFileShredder:
         Metode paling aman, tapi paling lama
         Dirancang untuk menghapus data dari berbagai jenis hard disk
         """
-        print("\n🔐 Gutmann Method (35 passes)")
-        print("   Most secure method - Maximum security")
-        print(f"   File: {filepath}")
-        print(f"   Size: {self._format_size(self.get_file_size(filepath))}\n")
-        
-        patterns = [
-            'random', 'random', 'random', 'random',  # Pass 1-4: Random
-            b'\x55', b'\xaa',  # Pass 5-6: Alternating bits
-            b'\x92\x49\x24', b'\x49\x24\x92', b'\x24\x92\x49',  # Pass 7-9: Special patterns
-            b'\x00', b'\x11', b'\x22', b'\x33', b'\x44',  # Pass 10-14
-            b'\x55', b'\x66', b'\x77', b'\x88', b'\x99',  # Pass 15-19
-            b'\xaa', b'\xbb', b'\xcc', b'\xdd', b'\xee',  # Pass 20-24
-            b'\xff', b'\x92\x49\x24', b'\x49\x24\x92',  # Pass 25-27
-            b'\x24\x92\x49', b'\x6d\xb6\xdb', b'\xb6\xdb\x6d',  # Pass 28-30
-            b'\xdb\x6d\xb6',  # Pass 31
-            'random', 'random', 'random', 'random'  # Pass 32-35: Random
-        ]
-        
-        for i, pattern in enumerate(patterns, 1):
-            print(f"  🔄 Pass {i}/35: ", end='')
-            if pattern == 'random':
-                print("Random data...")
-            else:
-                print(f"Pattern 0x{pattern.hex()}...")
-            self.overwrite_with_pattern(filepath, pattern, i, 35)
+        self._log("\n🔐 Gutmann Method (35 passes)")
+        self._log("   Most secure method - Maximum security")
+        self._log(f"   File: {filepath}")
+        file_size = self._log_size(filepath)
         
-        print("  ✅ Gutmann overwrite complete!")
+        self._overwrite_passes(filepath, self._method_passes('gutmann'), file_size)
+        
+        self._log("  ✅ Gutmann overwrite complete!")
     
     def quick_method(self, filepath, passes=7):
         """
@@ -123,32 +586,28 @@ class SecureFileShredder:
         Balance antara keamanan dan kecepatan
         Cocok untuk penggunaan umum
         """
-        print(f"\n⚡ Quick Method ({passes} passes)")
-        print("   Balanced security and speed")
-        print(f"   File: {filepath}")
-        print(f"   Size: {self._format_size(self.get_file_size(filepath))}\n")
+        self._log(f"\n⚡ Quick Method ({passes} passes)")
+        self._log("   Balanced security and speed")
+        self._log(f"   File: {filepath}")
+        file_size = self._log_size(filepath)
         
-        for i in range(1, passes + 1):
-            print(f"  🔄 Pass {i}/{passes}: Random data...")
-            self.overwrite_with_pattern(filepath, 'random', i, passes)
+        self._overwrite_passes(filepath, [('random', "Random data")] * passes, file_size)
         
-        print("  ✅ Quick overwrite complete!")
+        self._log("  ✅ Quick overwrite complete!")
     
     def simple_method(self, filepath, passes=3):
         """
         Simple Method (3 passes)
         Cepat, cukup aman untuk kebutuhan umum
         """
-        print(f"\n🚀 Simple Method ({passes} passes)")
-        print("   Fast and sufficient for general use")
-        print(f"   File: {filepath}")
-        print(f"   Size: {self._format_size(self.get_file_size(filepath))}\n")
+        self._log(f"\n🚀 Simple Method ({passes} passes)")
+        self._log("   Fast and sufficient for general use")
+        self._log(f"   File: {filepath}")
+        file_size = self._log_size(filepath)
         
-        for i in range(1, passes + 1):
-            print(f"  🔄 Pass {i}/{passes}: Random data...")
-            self.overwrite_with_pattern(filepath, 'random', i, passes)
+        self._overwrite_passes(filepath, [('random', "Random data")] * passes, file_size)
         
-        print("  ✅ Simple overwrite complete!")
+        self._log("  ✅ Simple overwrite complete!")
     
     def rename_file(self, filepath):
         """Rename file dengan nama random sebelum dihapus"""
@@ -168,24 +627,38 @@ class SecureFileShredder:
             os.remove(filepath)
             return True
         except Exception as e:
-            print(f"  ⚠️  Warning: Could not delete file: {e}")
+            self._log(f"  ⚠️  Warning: Could not delete file: {e}", 'warning')
             return False
     
+    def wipe_private_file(self, filepath):
+        """
+        Timpa satu pass random lalu rename + hapus, tanpa pesan ke observer.
+        Untuk file kecil milik tool sendiri (misal journal checkpoint).
+        """
+        with self._overwrite_handle(filepath) as handle:
+            file_size = os.fstat(handle['fd']).st_size
+            self._overwrite_pass(handle, 'random', 1, 1, file_size, progress=False)
+        return self.delete_file(self.rename_file(filepath))
+    
     def shred_file(self, filepath, method='quick'):
         """
         Main function untuk shred file
         """
         if not os.path.exists(filepath):
-            print(f"❌ Error: File '{filepath}' not found!")
+            self._log(f"❌ Error: File '{filepath}' not found!", 'error')
             return False
         
         if not os.path.isfile(filepath):
-            print(f"❌ Error: '{filepath}' is not a file!")
+            self._log(f"❌ Error: '{filepath}' is not a file!", 'error')
             return False
         
-        print("=" * 70)
-        print("🗑️  SECURE FILE SHREDDER")
-        print("=" * 70)
+        self._log("=" * 70)
+        self._log("🗑️  SECURE FILE SHREDDER")
+        self._log("=" * 70)
+        
+        file_size = self.get_file_size(filepath)
+        allocated = self.get_allocated_size(filepath)
+        start = time.perf_counter()
         
         # Pilih method
         if method == 'dod':
@@ -197,66 +670,468 @@ class SecureFileShredder:
         elif method == 'simple':
             self.simple_method(filepath, passes=3)
         else:
-            print(f"❌ Unknown method: {method}")
+            self._log(f"❌ Unknown method: {method}", 'error')
             return False
         
         # Rename file dengan nama random
-        print("\n  🔀 Renaming file to random name...")
+        self._log("\n  🔀 Renaming file to random name...")
         new_path = self.rename_file(filepath)
         if new_path != filepath:
-            print(f"  ✅ Renamed to: {os.path.basename(new_path)}")
+            self._log(f"  ✅ Renamed to: {os.path.basename(new_path)}")
         
         # Hapus file
-        print("  🗑️  Deleting file from filesystem...")
+        self._log("  🗑️  Deleting file from filesystem...")
         if self.delete_file(new_path):
-            print("  ✅ File deleted successfully!")
+            if self.journal is not None:
+                self.journal.finish(filepath)
+            self._log("  ✅ File deleted successfully!")
+        
+        self._log("\n" + "=" * 70)
+        self._log("✅ SECURE DELETION COMPLETE!")
+        self._log("=" * 70)
+        self._log("\n💡 File telah dihapus secara permanen dan tidak dapat di-recover!")
+        self._log("   Data sudah ditimpa berkali-kali dengan random data.\n")
         
-        print("\n" + "=" * 70)
-        print("✅ SECURE DELETION COMPLETE!")
-        print("=" * 70)
-        print("\n💡 File telah dihapus secara permanen dan tidak dapat di-recover!")
-        print("   Data sudah ditimpa berkali-kali dengan random data.\n")
+        self.observer.event('shred_done', file=filepath, method=method, bytes=file_size,
+                            allocated=allocated, seconds=time.perf_counter() - start)
+        return True
+    
+    def crypto_erase_file(self, filepath, method='quick'):
+        """
+        Crypto-erase container FileEncryptor: hanya header (berisi AES key yang
+        di-wrap) yang ditimpa dengan pass method, lalu file di-truncate dan
+        dihapus. Biaya I/O beberapa KB berapapun ukuran ciphertext.
+        File yang bukan container di-shred penuh seperti biasa.
+        """
+        if not os.path.isfile(filepath):
+            self._log(f"❌ Error: File '{filepath}' not found!", 'error')
+            return False
         
+        passes = self._method_passes(method)
+        file_size = self.get_file_size(filepath)
+        start = time.perf_counter()
+        with self._overwrite_handle(filepath) as handle:
+            is_container = self._limit_to_key_material(handle, file_size, ())
+            if is_container:
+                header_size = handle['extents'][0][1]
+                self._crypto_erase_header(handle, passes, method, file_size, header_size)
+        
+        if not is_container:
+            self._log(f"⚠️  '{filepath}' is not a FileEncryptor container, "
+                      f"doing a full shred instead", 'warning')
+            return self.shred_file(filepath, method)
+        
+        if not self.delete_file(self.rename_file(filepath)):
+            return False
+        if self.journal is not None:
+            self.journal.finish(filepath)
+        self._fsync_directory(os.path.dirname(os.path.abspath(filepath)))
+        self._log("  ✅ Key header destroyed, container deleted!")
+        
+        self.observer.event('crypto_erase_done', file=filepath, method=method, bytes=file_size,
+                            header_bytes=header_size, seconds=time.perf_counter() - start)
+        return True
+    
+    def _crypto_erase_header(self, handle, passes, method, file_size, header_size):
+        """Timpa header (extents handle sudah dibatasi) dengan semua pass, lalu truncate"""
+        self._log(f"\n🔑 Crypto-erase ({method}, {len(passes)} passes over the key header)")
+        self._log(f"   File: {handle['path']}")
+        self._log(f"   Size: {self._format_size(file_size)}, "
+                  f"header: {self._format_size(header_size)}\n")
+        for i, (pattern, description) in enumerate(passes, 1):
+            if i >= handle['resume_pass']:
+                self._log(f"  🔄 Pass {i}/{len(passes)}: {description}...")
+            self._overwrite_pass(handle, pattern, i, len(passes), file_size)
+        self._log("  ✂️  Truncating ciphertext...")
+        self._truncate_handle(handle)
+    
+    def _is_journal(self, path):
+        if self.journal is None:
+            return False
+        return os.path.abspath(path) in (self.journal.path, self.journal.path + '.tmp')
+    
+    def _iter_directory(self, dirpath, recursive):
+        """
+        Streaming discovery dengan os.scandir: yield (path, size, st_dev) tanpa
+        membangun daftar lengkap dulu. Symlink tidak diikuti (target di luar
+        directory tidak ikut tertimpa).
+        """
+        stack = [dirpath]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive:
+                                    stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False) and not self._is_journal(entry.path):
+                                st = entry.stat(follow_symlinks=False)
+                                yield entry.path, st.st_size, st.st_dev
+                        except OSError as e:
+                            self._log(f"  ⚠️  Warning: Skipping {entry.path}: {e}", 'warning')
+            except OSError as e:
+                self._log(f"  ⚠️  Warning: Cannot read directory {current}: {e}", 'warning')
+    
+    def _is_container(self, path, file_size):
+        """Cek apakah path berisi header container FileEncryptor yang valid"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            return _container_header_size(fd, file_size) is not None
+        finally:
+            os.close(fd)
+    
+    def _limit_to_key_material(self, handle, file_size, erased_stores):
+        """
+        Crypto-erase: batasi overwrite ke header container (extents = header saja).
+        Chunk store incremental yang manifest-nya sudah di-crypto-erase tidak
+        perlu ditimpa sama sekali. Return False kalau file harus di-shred penuh.
+        """
+        header_size = _container_header_size(handle['fd'], file_size)
+        if header_size is not None:
+            handle['extents'] = [(0, header_size)]
+        elif _store_of_chunk(handle['path']) in erased_stores:
+            handle['extents'] = []
+        else:
+            return False
+        handle['truncate'] = True
         return True
     
-    def shred_directory(self, dirpath, method='quick', recursive=False):
-        """Shred semua file dalam directory"""
+    def _shred_batch(self, batch, method, limit, crypto_erase=False, erased_stores=()):
+        """
+        Shred satu batch [(path, size), ...] dari device yang sama: setiap pass
+        menulis semua file dulu baru fdatasync, lalu rename + unlink semua dan
+        fsync directory induk sekali. Return (jumlah sukses, byte, daftar gagal).
+        Dengan crypto_erase, container FileEncryptor hanya ditimpa header-nya
+        lalu di-truncate.
+        """
+        with limit:
+            passes = self._method_passes(method)
+            failed = []
+            with ExitStack() as stack:
+                opened = []
+                for path, size in batch:
+                    try:
+                        handle = stack.enter_context(self._overwrite_handle(path))
+                        if crypto_erase:
+                            self._limit_to_key_material(handle, size, erased_stores)
+                        opened.append((handle, size))
+                    except OSError as e:
+                        failed.append((path, str(e)))
+                
+                try:
+                    for i, (pattern, _) in enumerate(passes, 1):
+                        start = time.perf_counter()
+                        largest = max((size for _, size in opened), default=0)
+                        shared = {}  # blocks dipakai bersama per mode (direct/buffered)
+                        for handle, size in opened:
+                            if handle['direct'] not in shared:
+                                shared[handle['direct']] = self._pass_blocks(
+                                    pattern, self._fit_block_size(handle, largest))
+                            self._overwrite_pass(handle, pattern, i, len(passes), size,
+                                                 blocks=shared[handle['direct']],
+                                                 sync=False, progress=False)
+                        for handle, size in opened:
+                            self._sync_handle(handle)
+                            self._checkpoint(handle, size, i + 1, 0)
+                        self.observer.phase('fsync', time.perf_counter() - start,
+                                            files=len(opened), pass_number=i)
+                    for handle, _ in opened:
+                        if handle.get('truncate'):
+                            self._truncate_handle(handle)
+                except OSError as e:
+                    return 0, 0, failed + [(handle['path'], str(e)) for handle, _ in opened]
+            
+            done = 0
+            nbytes = 0
+            directories = set()
+            skipped = {path for path, _ in failed}
+            for path, size in batch:
+                if path in skipped:
+                    continue
+                if self.delete_file(self.rename_file(path)):
+                    if self.journal is not None:
+                        self.journal.finish(path)
+                    done += 1
+                    nbytes += size
+                    directories.add(os.path.dirname(path))
+                else:
+                    failed.append((path, 'delete failed'))
+            # Rename & unlink baru permanen setelah directory di-fsync
+            for directory in directories:
+                self._fsync_directory(directory)
+            return done, nbytes, failed
+    
+    def _fsync_directory(self, directory):
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass  # tidak semua platform/filesystem bisa fsync directory
+    
+    def _truncate_handle(self, handle):
+        """Buang ciphertext (sudah tidak bisa didekripsi) dan pastikan ukuran 0 di disk"""
+        os.ftruncate(handle['fd'], 0)
+        os.fsync(handle['fd'])
+    
+    def shred_directory(self, dirpath, method='quick', recursive=False,
+                        workers=DEFAULT_DIR_WORKERS, per_device=DEFAULT_DEVICE_WORKERS,
+                        crypto_erase=False):
+        """
+        Shred semua file dalam directory secara paralel.
+        File ditemukan secara streaming (os.scandir) dan langsung dikirim ke
+        thread pool per device (st_dev, maksimal per_device worker per device,
+        total maksimal workers). File kecil digabung per batch.
+        crypto_erase: container FileEncryptor cukup dihancurkan header-nya,
+        file lain tetap di-shred penuh.
+        """
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        
         if not os.path.exists(dirpath):
-            print(f"❌ Error: Directory '{dirpath}' not found!")
+            self._log(f"❌ Error: Directory '{dirpath}' not found!", 'error')
             return False
         
         if not os.path.isdir(dirpath):
-            print(f"❌ Error: '{dirpath}' is not a directory!")
+            self._log(f"❌ Error: '{dirpath}' is not a directory!", 'error')
             return False
         
-        print(f"\n🗂️  Shredding directory: {dirpath}")
-        print(f"   Recursive: {recursive}")
-        print(f"   Method: {method}\n")
+        self._method_passes(method)  # validasi method sebelum mulai
         
-        files_to_shred = []
+        self._log(f"\n🗂️  Shredding directory: {dirpath}")
+        self._log(f"   Recursive: {recursive}")
+        self._log(f"   Method: {method}")
+        self._log(f"   Workers: {workers} (max {per_device} per device)\n")
         
-        if recursive:
-            for root, dirs, files in os.walk(dirpath):
-                for filename in files:
-                    files_to_shred.append(os.path.join(root, filename))
-        else:
-            for item in os.listdir(dirpath):
-                item_path = os.path.join(dirpath, item)
-                if os.path.isfile(item_path):
-                    files_to_shred.append(item_path)
+        start = time.perf_counter()
+        total_limit = threading.BoundedSemaphore(max(1, workers))
+        pools = {}  # st_dev -> ThreadPoolExecutor
+        batches = {}  # st_dev -> [batch, ukuran batch]
+        pending = set()
+        found = 0
+        shredded = 0
+        shredded_bytes = 0
+        failures = []
+        
+        def collect(futures):
+            nonlocal shredded, shredded_bytes
+            for future in futures:
+                done, nbytes, failed = future.result()
+                shredded += done
+                shredded_bytes += nbytes
+                failures.extend(failed)
+                for path, reason in failed:
+                    self._log(f"  ❌ Failed: {path}: {reason}", 'error')
+            self.observer.progress('Files', shredded + len(failures), found)
         
-        if not files_to_shred:
-            print("⚠️  No files found to shred!")
+        def submit(device, batch):
+            nonlocal pending
+            if device not in pools:
+                pools[device] = ThreadPoolExecutor(max_workers=max(1, min(per_device, workers)))
+            pending.add(pools[device].submit(self._shred_batch, batch, method, total_limit,
+                                             crypto_erase, erased_stores))
+            # Batasi antrean supaya tree jutaan file tidak menumpuk di memori
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        
+        erased_stores = set()  # store incremental yang manifest-nya sudah dihancurkan
+        
+        try:
+            for path, size, device in self._iter_directory(dirpath, recursive):
+                found += 1
+                if (crypto_erase and os.path.basename(path) == STORE_MANIFEST
+                        and os.path.isdir(os.path.join(os.path.dirname(path), STORE_CHUNKS))):
+                    # Manifest dihancurkan dulu (sinkron) sebelum chunk-nya ditemukan
+                    # (subdirectory di-scan setelah file di directory yang sama), baru
+                    # setelah itu chunk cukup di-unlink. Manifest yang bukan container
+                    # di-shred penuh dan chunk-nya juga tetap ditimpa penuh.
+                    is_container = self._is_container(path, size)
+                    collect([_completed(self._shred_batch([(path, size)], method, total_limit,
+                                                          True, erased_stores))])
+                    if is_container and not os.path.exists(path):
+                        erased_stores.add(os.path.dirname(path))
+                    continue
+                if size >= SMALL_FILE_SIZE:
+                    submit(device, [(path, size)])
+                    continue
+                batch = batches.setdefault(device, [[], 0])
+                batch[0].append((path, size))
+                batch[1] += size
+                if len(batch[0]) >= BATCH_FILES or batch[1] >= BATCH_BYTES:
+                    submit(device, batches.pop(device)[0])
+            for device, (batch, _) in list(batches.items()):
+                submit(device, batch)
+            collect(wait(pending).done)
+        finally:
+            # Error / Ctrl-C: batch yang belum jalan dibatalkan, yang sedang jalan
+            # ditunggu (progress-nya sudah tercatat di journal kalau ada)
+            for future in pending:
+                future.cancel()
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        
+        if not found:
+            self._log("⚠️  No files found to shred!", 'warning')
             return False
         
-        print(f"📋 Found {len(files_to_shred)} file(s) to shred\n")
+        seconds = time.perf_counter() - start
+        self.observer.event('shred_directory_done', directory=dirpath, method=method,
+                            files=shredded, failed=len(failures), bytes=shredded_bytes,
+                            crypto_erase=crypto_erase, seconds=seconds)
+        if failures:
+            self._log(f"\n⚠️  {shredded}/{found} file(s) shredded, {len(failures)} failed", 'warning')
+            return False
+        self._log(f"\n✅ All {shredded} file(s) shredded successfully! "
+                  f"({self._format_size(shredded_bytes)} in {seconds:.1f}s)")
+        return True
+    
+    def _free_bytes(self, mount):
+        st = os.statvfs(mount)
+        return st.f_bavail * st.f_frsize
+    
+    def _fill_worker(self, fill_dir, worker_id, pattern, budget):
+        """
+        Tulis fill file baru (maksimal FILL_FILE_SIZE per file) dengan block
+        besar sampai budget habis atau disk penuh. Return daftar path.
+        """
+        block_size = max(self.chunk_size, FILL_BLOCK_SIZE)
+        block_size -= block_size % DIRECT_ALIGN
+        blocks = self._pass_blocks(pattern, block_size)
+        paths = []
+        while not budget['stop']:
+            path = os.path.join(fill_dir, f'fill_{worker_id}_{len(paths)}')
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+            paths.append(path)
+            with self._overwrite_handle(path) as handle:
+                written = 0
+                while written < FILL_FILE_SIZE:
+                    block = next(blocks)
+                    with budget['lock']:
+                        # Block terakhir dipotong (kelipatan DIRECT_ALIGN) supaya reserve utuh
+                        size = min(len(block), budget['target'] - budget['claimed'])
+                        size -= size % DIRECT_ALIGN
+                        if budget['stop'] or size <= 0:
+                            budget['stop'] = True
+                            break
+                        budget['claimed'] += size
+                    try:
+                        self._write_block(handle, block, size, written, UNKNOWN_END)
+                    except OSError as e:
+                        if e.errno not in (errno.ENOSPC, errno.EDQUOT):
+                            raise
+                        budget['stop'] = True  # disk penuh lebih cepat (ada proses lain yang menulis)
+                        break
+                    written += size
+                    with budget['lock']:
+                        budget['written'] += size
+                try:
+                    self._sync_handle(handle)
+                except OSError as e:
+                    if e.errno not in (errno.ENOSPC, errno.EDQUOT):
+                        raise
+                    budget['stop'] = True
+        return paths
+    
+    def _overwrite_fill_file(self, path, pattern, pass_number, total_passes):
+        """Pass berikutnya: timpa fill file in-place (block yang sama di disk)"""
+        with self._overwrite_handle(path) as handle:
+            self._overwrite_pass(handle, pattern, pass_number, total_passes,
+                                 self.get_file_size(path), progress=False)
+        return self.get_file_size(path)
+    
+    def wipe_free_space(self, mount, method='quick', workers=DEFAULT_DEVICE_WORKERS,
+                        reserve=DEFAULT_FREE_SPACE_RESERVE):
+        """
+        Timpa free space filesystem (sisa data file yang dulu dihapus biasa).
+        Pass 1 mengisi free space dengan fill file paralel sampai tersisa
+        reserve byte; pass berikutnya menimpa fill file yang sama. Fill file
+        di-fsync lalu selalu dihapus, juga kalau terputus (Ctrl-C / SIGTERM / error).
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
         
-        for i, filepath in enumerate(files_to_shred, 1):
-            print(f"\n[{i}/{len(files_to_shred)}] Processing: {os.path.basename(filepath)}")
-            self.shred_file(filepath, method)
+        if not os.path.isdir(mount):
+            self._log(f"❌ Error: '{mount}' is not a directory!", 'error')
+            return False
+        passes = self._method_passes(method)
+        workers = max(1, workers)
+        
+        free = self._free_bytes(mount)
+        target = free - reserve
+        self._log(f"\n🧹 Wiping free space: {mount}")
+        self._log(f"   Method: {method} ({len(passes)} passes), workers: {workers}")
+        self._log(f"   Free: {self._format_size(free)}, reserved: {self._format_size(reserve)}\n")
+        if target <= 0:
+            self._log("⚠️  Free space is already below the reserve, nothing to wipe", 'warning')
+            return False
         
-        print(f"\n✅ All {len(files_to_shred)} file(s) shredded successfully!")
+        start = time.perf_counter()
+        fill_dir = os.path.join(mount, f'.secure_delete_fill_{os.urandom(4).hex()}')
+        os.mkdir(fill_dir, 0o700)
+        paths = []
+        filled = 0
+        with _terminate_as_interrupt():
+            try:
+                for i, (pattern, description) in enumerate(passes, 1):
+                    self._log(f"  🔄 Pass {i}/{len(passes)}: {description}...")
+                    label = f'Pass {i}/{len(passes)}'
+                    pass_start = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        if i == 1:
+                            budget = {'lock': threading.Lock(), 'target': target, 'claimed': 0,
+                                      'written': 0, 'stop': False}
+                            pending = {pool.submit(self._fill_worker, fill_dir, worker, pattern,
+                                                   budget) for worker in range(workers)}
+                        else:
+                            budget = None
+                            pending = {pool.submit(self._overwrite_fill_file, path, pattern, i,
+                                                   len(passes)) for path in paths}
+                        done_bytes = 0
+                        try:
+                            while pending:
+                                done, pending = wait(pending, timeout=0.5)
+                                for future in done:
+                                    if budget is not None:
+                                        paths.extend(future.result())
+                                    else:
+                                        done_bytes += future.result()
+                                self.observer.progress(label,
+                                                       budget['written'] if budget else done_bytes,
+                                                       target if budget else filled)
+                        except BaseException:
+                            if budget is not None:
+                                budget['stop'] = True
+                            for future in pending:
+                                future.cancel()
+                            raise
+                    if budget is not None:
+                        filled = budget['written']
+                        self.observer.progress(label, filled, filled)
+                    self.observer.phase('fill', time.perf_counter() - pass_start, filled,
+                                        mount=mount, pass_number=i)
+            finally:
+                # Fill file selalu dibuang, disk tidak boleh tertinggal penuh
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                for leftover in os.listdir(fill_dir):
+                    os.remove(os.path.join(fill_dir, leftover))
+                os.rmdir(fill_dir)
+                self._fsync_directory(mount)
         
+        seconds = time.perf_counter() - start
+        self._log(f"\n✅ Free space wiped: {self._format_size(filled)} x {len(passes)} passes "
+                  f"in {seconds:.1f}s ({filled * len(passes) / (1024 * 1024) / max(seconds, 1e-9):.0f} MB/s)")
+        self.observer.event('free_space_done', mount=mount, method=method, bytes=filled,
+                            passes=len(passes), seconds=seconds)
         return True
     
     def _format_size(self, size_bytes):
@@ -294,6 +1169,18 @@ Examples:
   
   # Shred directory recursively
   python secure_delete.py --directory ./secrets --recursive
+  
+  # Quiet, with JSON-lines metrics for monitoring
+  python secure_delete.py -y -q --metrics shred.jsonl big.img
+  
+  # Crypto-erase encrypted containers (only the key header is overwritten)
+  python secure_delete.py --crypto-erase --directory -r ./encrypted_archive
+  
+  # Wipe free space (leftovers of files deleted earlier), keep 1G headroom
+  python secure_delete.py --free-space /home --reserve 1G
+  
+  # Continue a job that was interrupted (crash, Ctrl-C, restart)
+  python secure_delete.py --method gutmann --resume disk.img
 
 ⚠️  WARNING: This operation is IRREVERSIBLE!
    Files will be permanently destroyed and cannot be recovered.
@@ -314,10 +1201,52 @@ Examples:
     parser.add_argument('-y', '--yes',
                        action='store_true',
                        help='Skip confirmation prompt')
+    parser.add_argument('-q', '--quiet',
+                       action='store_true',
+                       help='Only print errors (no progress bar)')
+    parser.add_argument('--metrics',
+                       metavar='FILE',
+                       help='Append per-pass timings as JSON lines to FILE')
+    parser.add_argument('-b', '--block-size',
+                       type=parse_size,
+                       default=DEFAULT_BLOCK_SIZE,
+                       help='Write block size, e.g. 4M (default: 1M)')
+    parser.add_argument('--direct',
+                       action='store_true',
+                       help='Bypass page cache with O_DIRECT (falls back to fadvise if unsupported)')
+    parser.add_argument('--crypto-erase',
+                       action='store_true',
+                       help='For FileEncryptor containers, destroy only the key header '
+                            '(other files are fully shredded)')
+    parser.add_argument('--free-space',
+                       metavar='MOUNT',
+                       help='Wipe free space of the filesystem mounted at MOUNT')
+    parser.add_argument('--reserve',
+                       type=parse_size,
+                       default=DEFAULT_FREE_SPACE_RESERVE,
+                       help='Free space to leave untouched with --free-space (default: 256M)')
+    parser.add_argument('--resume',
+                       action='store_true',
+                       help='Continue an interrupted job from its checkpoint journal')
+    parser.add_argument('--journal',
+                       metavar='FILE',
+                       help=f'Checkpoint journal path (default: PATH{JOURNAL_SUFFIX})')
+    parser.add_argument('--checkpoint-interval',
+                       type=float,
+                       default=DEFAULT_CHECKPOINT_INTERVAL,
+                       help=f'Seconds between checkpoints (default: {DEFAULT_CHECKPOINT_INTERVAL:g})')
+    parser.add_argument('-j', '--jobs',
+                       type=int,
+                       default=DEFAULT_DIR_WORKERS,
+                       help=f'Parallel workers for --directory (default: {DEFAULT_DIR_WORKERS})')
+    parser.add_argument('--per-device',
+                       type=int,
+                       default=DEFAULT_DEVICE_WORKERS,
+                       help=f'Max workers writing to one device (default: {DEFAULT_DEVICE_WORKERS})')
     
     args = parser.parse_args()
     
-    if not args.path:
+    if not args.path and not args.free_space:
         parser.print_help()
         return
     
@@ -330,13 +1259,55 @@ Examples:
             print("\n❌ Operation cancelled.")
             return
     
-    shredder = SecureFileShredder()
+    if args.free_space:
+        shredder = SecureFileShredder(observer=build_observer(args.quiet, args.metrics),
+                                      block_size=args.block_size, direct_io=args.direct)
+        try:
+            ok = shredder.wipe_free_space(args.free_space, method=args.method,
+                                          workers=min(args.jobs, args.per_device),
+                                          reserve=args.reserve)
+        except KeyboardInterrupt:
+            print("\n⚠️  Interrupted, fill files removed", file=sys.stderr)
+            return 130
+        finally:
+            shredder.observer.close()
+        return 0 if ok else 1
+    
+    journal = ShredJournal(args.journal or default_journal_path(args.path),
+                           interval=args.checkpoint_interval)
+    job = {'target': os.path.abspath(args.path), 'method': args.method,
+           'directory': args.directory, 'recursive': args.recursive,
+           'crypto_erase': args.crypto_erase}
+    try:
+        resumed = journal.begin(job, resume=args.resume)
+    except ValueError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
     
-    if args.directory:
-        shredder.shred_directory(args.path, method=args.method, recursive=args.recursive)
-    else:
-        shredder.shred_file(args.path, method=args.method)
+    shredder = SecureFileShredder(observer=build_observer(args.quiet, args.metrics),
+                                  block_size=args.block_size, direct_io=args.direct,
+                                  journal=journal)
+    if args.resume and not resumed:
+        shredder._log(f"⚠️  No journal at {journal.path}, starting from the beginning", 'warning')
+    elif not args.resume and os.path.exists(journal.path):
+        shredder._log(f"⚠️  Found journal of an interrupted job ({journal.path}); "
+                      f"use --resume to continue it. Starting over.", 'warning')
+    
+    try:
+        if args.directory:
+            ok = shredder.shred_directory(args.path, method=args.method, recursive=args.recursive,
+                                          workers=args.jobs, per_device=args.per_device,
+                                          crypto_erase=args.crypto_erase)
+        elif args.crypto_erase:
+            ok = shredder.crypto_erase_file(args.path, method=args.method)
+        else:
+            ok = shredder.shred_file(args.path, method=args.method)
+        if ok:
+            journal.complete(shredder)
+    finally:
+        shredder.observer.close()
+    return 0 if ok else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())